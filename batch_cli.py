@@ -0,0 +1,231 @@
+import argparse
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from functools import partial
+from itertools import groupby
+from pathlib import Path
+from common.excel_loader import load_sheet, measure_peak_memory
+from common.sheet_cache import load_sheet_cached
+from common.batch import (compare_with_per_farmer, default_workers, estimate_output, iter_jobs, job_pages, plan_jobs,
+                          run_batch)
+from layouts import registry
+from common.archive import run_archive
+from common import profiling
+from common.print_queue import backend_from_spec, print_jobs, print_merged
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate farmer PDFs from an Excel sheet without opening the window."
+    )
+    parser.add_argument("excel", help="Path to the source .xlsx/.xls file")
+    parser.add_argument("--layout", default=registry.DEFAULT_LAYOUT, choices=registry.names())
+    parser.add_argument("--block", help="Only this block")
+    parser.add_argument("--village", help="Only this village")
+    parser.add_argument("--fid", help="Only this farmer ID")
+    parser.add_argument("--out-dir", default=".", help="Directory for the generated PDFs")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Number of rendering processes (default: one per CPU)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always parse the workbook instead of using the on-disk sheet cache")
+    parser.add_argument("--report-memory", action="store_true",
+                        help="Report peak memory used while loading the sheet (slower load)")
+    parser.add_argument("--merge-village", action="store_true",
+                        help="Write one PDF per village instead of one per farmer")
+    parser.add_argument("--compare", action="store_true",
+                        help="With --merge-village, also render per-farmer files to report the saving")
+    parser.add_argument("--vector-sign-text", action="store_true",
+                        help="Layout2: draw farmer name/contact as PDF text over the signature image")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rebuild PDFs whose rows or layout changed and delete ones no longer produced "
+                             "(tracked in a manifest inside --out-dir)")
+    parser.add_argument("--fast-grid", action="store_true",
+                        help="Draw the data table pages straight onto the canvas instead of laying out Tables")
+    parser.add_argument("--archive", metavar="FILE",
+                        help="Write all PDFs into one .zip/.tar/.tar.gz archive (relative to --out-dir) "
+                             "instead of separate files")
+    parser.add_argument("--print", metavar="BACKEND", dest="print_backend",
+                        help="Print the PDFs instead of keeping them: default, shell, lpr[:PRINTER] or dir:PATH. "
+                             "Files are rendered to a temp folder and queued for printing as they finish")
+    parser.add_argument("--plan", action="store_true",
+                        help="Only report the pages and an estimated output size per village, writing nothing "
+                             "(renders two farmers in memory to size them)")
+    parser.add_argument("--profile", metavar="TRACE",
+                        help="Time every pipeline stage, print a summary and write a Chrome trace (JSON) to TRACE")
+    return parser.parse_args(argv)
+
+
+def print_result(result):
+    status = "FAIL" if result.error else "ok"
+    line = f"{status:4} {result.seconds:7.2f}s  {result.block} / {result.village} / {result.fid} ({result.farmer})"
+    if result.error:
+        line += f"  -> {result.error}"
+    print(line, flush=True)
+
+
+def print_removed(path):
+    print(f"del  {path.name} (no longer in the sheet)", flush=True)
+
+
+def print_village(compare, save_path, jobs, results, seconds):
+    failed = sum(1 for r in results if r.error)
+    if not save_path.exists():
+        print(f"     {save_path.name}: not written ({failed} failed)", flush=True)
+        return
+    size = save_path.stat().st_size
+    print(f"     {save_path.name}: {len(jobs) - failed} farmers, {size / 1024:.0f} KB in {seconds:.2f}s", flush=True)
+    if compare:
+        report = compare_with_per_farmer(jobs, save_path, seconds)
+        saved_bytes = report["per_farmer_bytes"] - report["merged_bytes"]
+        saved_seconds = report["per_farmer_seconds"] - report["merged_seconds"]
+        print(f"     per-farmer files: {report['per_farmer_bytes'] / 1024:.0f} KB in "
+              f"{report['per_farmer_seconds']:.2f}s -> merged saves {saved_bytes / 1024:.0f} KB "
+              f"({100 * saved_bytes / max(report['per_farmer_bytes'], 1):.0f}%) and {saved_seconds:.2f}s",
+              flush=True)
+
+
+def print_plan(df, args, options):
+    jobs = plan_jobs(df, args.layout, "", args.block, args.village, args.fid, options=options)
+    for (block, village), village_jobs in groupby(jobs, key=lambda j: (j.block, j.village)):
+        village_jobs = list(village_jobs)
+        pages = sum(job_pages(job) for job in village_jobs)
+        print(f"     {block} / {village}: {len(village_jobs)} farmers, {pages} pages", flush=True)
+    estimate = estimate_output(jobs, merge_village=args.merge_village)
+    size = "unknown (sample render failed)" if estimate["bytes"] is None else f"~{estimate['bytes'] / 2**20:.1f} MB"
+    print(f"\n{len(jobs)} farmers: {estimate['documents']} PDFs, {estimate['pages']} pages, {size}")
+
+
+def print_batch(df, args, backend, options):
+    temp_dir = Path(tempfile.mkdtemp(prefix="smart-pdf-print-"))
+    jobs = iter_jobs(df, args.layout, temp_dir, args.block, args.village, args.fid, options=options)
+    if args.merge_village:
+        # One print job per village
+        results = []
+        for (block, village), village_jobs in groupby(jobs, key=lambda j: (j.block, j.village)):
+            save_path = temp_dir / f"{block} {village}_print.pdf"
+            village_results = print_merged(list(village_jobs), backend, save_path, on_result=print_result)
+            for r in village_results:
+                if r.pages:
+                    print(f"     pages {r.pages[0]}-{r.pages[1]}  {r.fid} ({r.farmer})", flush=True)
+            results += village_results
+    else:
+        results = print_jobs(jobs, backend, workers=args.workers, on_result=print_result)
+    # Printed files are removed by the queue; anything left was refused by the
+    # printer (page range logs of merged jobs are kept with them)
+    leftover = [p for p in temp_dir.iterdir() if p.suffix == ".pdf"]
+    if leftover:
+        print(f"{len(leftover)} files were not printed, kept in {temp_dir}", flush=True)
+    else:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile:
+        profiling.enable()
+    start = time.perf_counter()
+
+    try:
+        from_cache = False
+        if args.report_memory:
+            df, peak = measure_peak_memory(load_sheet, args.excel)
+        elif args.no_cache:
+            df = load_sheet(args.excel)
+        else:
+            df, from_cache = load_sheet_cached(args.excel)
+    except Exception as e:
+        print(f"Error reading Excel:\n{e}", file=sys.stderr)
+        return 2
+    load_seconds = time.perf_counter() - start
+    print(f"Loaded {len(df)} rows in {load_seconds:.2f}s{' (cached)' if from_cache else ''}", flush=True)
+    if args.report_memory:
+        print(f"Peak memory while loading: {peak / 2**20:.1f} MB", flush=True)
+
+    options = {}
+    if args.vector_sign_text:
+        if args.layout != "Layout2":
+            print("--vector-sign-text only applies to Layout2", file=sys.stderr)
+            return 2
+        options["vector_sign_text"] = True
+    if args.fast_grid:
+        options["fast_grid"] = True
+
+    if args.plan:
+        print_plan(df, args, options)
+        return 0
+    if args.print_backend:
+        if args.incremental:
+            print("--print can't be combined with --incremental", file=sys.stderr)
+            return 2
+        try:
+            backend = backend_from_spec(args.print_backend)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+        results = print_batch(df, args, backend, options)
+    elif args.archive:
+        if args.merge_village or args.incremental:
+            print("--archive can't be combined with --merge-village or --incremental", file=sys.stderr)
+            return 2
+        archive_path = Path(args.out_dir) / args.archive
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+        jobs = iter_jobs(df, args.layout, "", args.block, args.village, args.fid, options=options)
+        try:
+            results = run_archive(jobs, archive_path, workers=args.workers, on_result=print_result)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+        if archive_path.exists():
+            print(f"     {archive_path}: {archive_path.stat().st_size / 1024:.0f} KB", flush=True)
+    else:
+        interrupted = []
+        if args.merge_village:
+            # Villages are merged in this process, so Ctrl+C can stop the run
+            # cleanly: villages already written (and recorded) are kept
+            previous_handler = signal.signal(signal.SIGINT, lambda *_: interrupted.append(True))
+        try:
+            results = run_batch(
+                df, args.layout, Path(args.out_dir),
+                block=args.block, village=args.village, fid=args.fid,
+                workers=args.workers, on_result=print_result, options=options,
+                merge_village=args.merge_village, on_village=partial(print_village, args.compare),
+                incremental=args.incremental, on_removed=print_removed,
+                should_stop=lambda: bool(interrupted),
+            )
+        finally:
+            if args.merge_village:
+                signal.signal(signal.SIGINT, previous_handler)
+        if interrupted:
+            print("\nInterrupted: kept the villages finished so far", flush=True)
+
+    skipped = sum(1 for r in results if r.skipped)
+    results = [r for r in results if not r.skipped]
+    failures = [r for r in results if r.error]
+    total = time.perf_counter() - start
+    print(f"\nRendered {len(results) - len(failures)}/{len(results)} farmers in {total:.2f}s")
+    if args.incremental:
+        print(f"Unchanged, skipped: {skipped} farmers")
+    if results:
+        render_times = [r.seconds for r in results]
+        print(f"Per farmer: avg {sum(render_times) / len(render_times):.2f}s, max {max(render_times):.2f}s")
+        decodes = sum(r.image_decodes for r in results)
+        hits = sum(r.image_hits for r in results)
+        print(f"Images: {decodes} decoded from disk, {hits} served from cache")
+    if args.profile:
+        print("\n" + profiling.format_summary())
+        profiling.export_chrome_trace(args.profile)
+        print(f"Trace written to {args.profile}")
+    if failures:
+        print(f"\n{len(failures)} failed:")
+        for r in failures:
+            print(f"  {r.block} / {r.village} / {r.fid} ({r.farmer}): {r.error}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
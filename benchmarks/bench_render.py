@@ -0,0 +1,192 @@
+"""Stage-by-stage timings of PDF generation for both layouts.
+
+Builds a synthetic workbook (see synthetic_workbook.py), then times every
+stage the app goes through: Excel load, sheet index, per-farmer filtering,
+transform_filtered_data*, batch planning, flowable construction, doc.build
+and the file write. Results go to a JSON file so runs can be compared:
+
+    python benchmarks/bench_render.py --rows 50000 --farmers 200 --json after.json
+    python benchmarks/bench_render.py --compare before.json after.json
+
+Rendering stages run for the first --farmers farmers of the sheet; load,
+index and planning always cover the whole sheet. Without --assets, blank
+placeholder artwork is used, so absolute render times are a little lower
+than with the real images but comparable between runs.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from synthetic_workbook import add_sheet_arguments, placeholder_assets, sheet_from_args, write_workbook  # noqa: E402
+from common.excel_loader import load_sheet  # noqa: E402
+from common.sheet_index import SheetIndex  # noqa: E402
+from common.batch import load_layout, plan_jobs  # noqa: E402
+from layouts import registry  # noqa: E402
+from common.data_transform import cell_text  # noqa: E402
+from common.pdf_builder import render_document, write_pdf  # noqa: E402
+
+PAGE_OBJECT = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+LAYOUT_STAGES = ["filter", "transform", "plan", "flowables", "doc_build", "write"]
+
+
+class Timer:
+    # Accumulates seconds and item counts per stage
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, stage, seconds, count=1):
+        entry = self.stages.setdefault(stage, {"seconds": 0.0, "count": 0})
+        entry["seconds"] += seconds
+        entry["count"] += count
+
+    def timed(self, stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        value = func(*args, **kwargs)
+        self.add(stage, time.perf_counter() - start)
+        return value
+
+    def report(self):
+        return {
+            stage: dict(entry, ms_per_item=1e3 * entry["seconds"] / max(entry["count"], 1))
+            for stage, entry in self.stages.items()
+        }
+
+
+def first_farmers(index, limit):
+    farmers = []
+    for block in index.blocks():
+        for village in index.villages(block):
+            for fid, farmer, _ in index.farmer_groups(block, village):
+                farmers.append((block, village, fid, farmer))
+                if len(farmers) >= limit:
+                    return farmers
+    return farmers
+
+
+def bench_layout(layout_name, df, index, farmers, out_dir, options):
+    layout, transform = load_layout(layout_name)
+    timer = Timer()
+    timer.timed("plan", plan_jobs, df, layout_name, out_dir, index=index, options=options)
+
+    pages = 0
+    for block, village, fid, farmer in farmers:
+        rows = timer.timed("filter", lambda: df.iloc[index.rows(block, village, fid, farmer)])
+        transformed = timer.timed("transform", transform, rows)
+        contact = cell_text(rows["Contact Number"].iloc[0])
+        elements = timer.timed("flowables", layout.build_elements,
+                               transformed, block, village, fid, farmer, contact, rows, **options)
+        data = timer.timed("doc_build", render_document, elements, layout.DOC_MARGINS)
+        timer.timed("write", write_pdf, data, out_dir / f"{block} {village} {fid}.pdf")
+        pages += len(PAGE_OBJECT.findall(data))
+    return {"farmers": len(farmers), "pages": pages, "stages": timer.report()}
+
+
+def run(args):
+    json_path = Path(args.json).resolve()
+    work_dir = Path(tempfile.mkdtemp(prefix="smart-pdf-bench-"))
+    cwd = os.getcwd()
+    try:
+        results = bench(args, work_dir)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    json_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print_results(results)
+    print(f"\nWrote {json_path}")
+
+
+def bench(args, work_dir):
+    df_source = sheet_from_args(args)
+    workbook = work_dir / "sheet.xlsx"
+    start = time.perf_counter()
+    write_workbook(df_source, workbook)
+    generate_seconds = time.perf_counter() - start
+
+    # The layouts find images/ and fonts/ relative to the working directory
+    assets = Path(args.assets).resolve() if args.assets else placeholder_assets(work_dir / "assets")
+    os.chdir(assets)
+
+    sheet = Timer()
+    df = sheet.timed("excel_load", load_sheet, workbook)
+    index = sheet.timed("index", SheetIndex, df)
+    farmers = first_farmers(index, args.farmers)
+    options = {"fast_grid": True} if args.fast_grid else {}
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "versions": {name: __import__(name).__version__ for name in ("pandas", "reportlab", "openpyxl")},
+            "sheet": {
+                "rows": len(df), "farmers": int(df["FID"].nunique()),
+                "villages": int(df[["Block", "Village"]].drop_duplicates().shape[0]),
+                "farmers_per_village": args.farmers_per_village, "crops_per_farmer": args.crops_per_farmer,
+                "rows_per_farmer": args.rows_per_farmer, "skew": args.skew, "seed": args.seed,
+                "workbook_bytes": workbook.stat().st_size, "generate_seconds": generate_seconds,
+            },
+            "assets": "real" if args.assets else "placeholder",
+            "options": options,
+        },
+        "sheet": sheet.report(),
+        "layouts": {},
+    }
+    for layout_name in args.layouts:
+        out_dir = work_dir / layout_name
+        out_dir.mkdir()
+        # First render decodes and registers the artwork; keep it out of the numbers
+        bench_layout(layout_name, df, index, farmers[:1], out_dir, options)
+        results["layouts"][layout_name] = bench_layout(layout_name, df, index, farmers, out_dir, options)
+    return results
+
+
+def print_results(results, baseline=None):
+    def line(name, entry, base):
+        text = f"  {name:12} {entry['seconds']:9.3f}s  {entry['ms_per_item']:9.2f} ms/item  x{entry['count']}"
+        if base:
+            text += f"  ({100 * (entry['seconds'] / max(base['seconds'], 1e-9) - 1):+.1f}%)"
+        print(text)
+
+    sheet = results["meta"]["sheet"]
+    print(f"{sheet['rows']} rows, {sheet['farmers']} farmers, {sheet['villages']} villages")
+    for stage, entry in results["sheet"].items():
+        line(stage, entry, baseline and baseline["sheet"].get(stage))
+    for layout_name, layout in results["layouts"].items():
+        print(f"{layout_name}: {layout['farmers']} farmers, {layout['pages']} pages")
+        base = baseline and baseline["layouts"].get(layout_name, {}).get("stages", {})
+        for stage in LAYOUT_STAGES:
+            if stage in layout["stages"]:
+                line(stage, layout["stages"][stage], base and base.get(stage))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_sheet_arguments(parser)
+    parser.add_argument("--farmers", type=int, default=100, help="Farmers to render per layout")
+    parser.add_argument("--layouts", nargs="+", default=registry.names(), choices=registry.names())
+    parser.add_argument("--fast-grid", action="store_true", help="Render with the fast_grid option")
+    parser.add_argument("--assets", metavar="DIR", help="Folder with the real images/ and fonts/")
+    parser.add_argument("--json", default="bench_render.json", help="Where to write the results")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Print AFTER's timings with the change against BEFORE, then exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        before, after = (json.loads(Path(p).read_text(encoding="utf-8")) for p in args.compare)
+        print_results(after, before)
+        return
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Per-row cost of the transform + display-formatting stage.
+
+Compares the original per-row lambdas (kept below as the reference) with
+the vectorized versions in common/data_transform.py on a synthetic sheet:
+
+    python benchmarks/bench_transform.py --rows 100000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from common.data_transform import display_frame, transform_filtered_data, transform_filtered_data2  # noqa: E402
+
+
+def legacy_transform(df_final_filtered):
+    # transform_filtered_data before vectorization, plus the per-cell display map the layouts ran
+    df = df_final_filtered.copy()
+    transformed = pd.DataFrame({
+        "क्र.सं.": range(1, len(df) + 1),
+        "सीएलएस नंबर": df["Saksham ID"].astype(str).apply(lambda x: x.split("-")[-1] if "-" in x else x),
+        "आवेदन संख्या": df["Intimation_Application id"],
+        "फसल का नाम": df["Crop"],
+        "सर्वे/उप सर्वे नंबर": df["Survey Number"],
+        "प्रभावित क्षेत्र (हेक्टेयर में)": df["Crop Area"],
+        "हानि प्रतिशत": "",
+        "रिमार्क": ""
+    })
+    return transformed.map(lambda x: "" if pd.isna(x) else str(x))
+
+
+def vectorized_transform(df_final_filtered):
+    return display_frame(transform_filtered_data(df_final_filtered))
+
+
+def vectorized_transform2(df_final_filtered):
+    return display_frame(transform_filtered_data2(df_final_filtered))
+
+
+def synthetic_rows(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    area = rng.random(rows).round(4)
+    area[rng.random(rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        "Saksham ID": [f"HR-2024-{n}" for n in rng.integers(1000, 99999, rows)],
+        "Intimation_Application id": rng.integers(10**14, 10**15, rows).astype(str),
+        "Crop": pd.Categorical(rng.choice(["Cotton", "Paddy", "Bajra", "Guar"], rows)),
+        "Survey Number": [f"{a}//{b}" for a, b in rng.integers(1, 300, (rows, 2))],
+        "Crop Area": area,
+    })
+
+
+def best_of(func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = synthetic_rows(args.rows)
+    print(f"{args.rows} rows, best of {args.repeat}")
+    for name, func in [
+        ("legacy (apply + map)", legacy_transform),
+        ("vectorized layout1", vectorized_transform),
+        ("vectorized layout2", vectorized_transform2),
+    ]:
+        seconds = best_of(func, df, args.repeat)
+        print(f"  {name:24} {seconds:8.3f}s  {1e6 * seconds / args.rows:7.2f} us/row")
+
+
+if __name__ == "__main__":
+    main()
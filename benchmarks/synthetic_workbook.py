@@ -0,0 +1,137 @@
+"""Synthetic workbooks shaped like the crop-loss export the app reads.
+
+    python benchmarks/synthetic_workbook.py sheet.xlsx --rows 50000 --farmers-per-village 40
+
+Rows per farmer follow a log-normal spread controlled by --skew (0 gives
+every farmer the same number of rows; 1 already gives a long tail of
+farmers with many fields). Also creates placeholder images/ and fonts/ so
+the layouts can render on a machine without the real artwork.
+"""
+import argparse
+import os
+import shutil
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from common.excel_loader import LAYOUT_COLUMNS  # noqa: E402
+from layouts import registry  # noqa: E402
+
+CROPS = ["Cotton", "Paddy", "Bajra", "Guar", "Wheat", "Mustard", "Moong", "Jowar"]
+
+
+def rows_per_farmer(rows, farmers, skew, rng):
+    # Split rows over farmers (each gets at least one), long-tailed for skew > 0
+    weights = rng.lognormal(0.0, skew, farmers) if skew > 0 else np.ones(farmers)
+    share = weights / weights.sum() * (rows - farmers)
+    counts = 1 + np.floor(share).astype(int)
+    # Hand the rows lost to rounding to the largest remainders
+    counts[np.argsort(np.floor(share) - share)[:rows - counts.sum()]] += 1
+    return counts
+
+
+def synthetic_sheet(rows, farmers_per_village=20, villages_per_block=10, crops_per_farmer=2,
+                    rows_per_farmer_mean=6, skew=0.75, seed=0):
+    # DataFrame with the sheet's columns in sheet order: blocks and villages
+    # contiguous, each farmer's fields together, crops mixed within a farmer.
+    rng = np.random.default_rng(seed)
+    farmers = max(1, min(rows, round(rows / rows_per_farmer_mean)))
+    counts = rows_per_farmer(rows, farmers, skew, rng)
+
+    farmer_no = np.repeat(np.arange(farmers), counts)
+    village_no = farmer_no // farmers_per_village
+    block_no = village_no // villages_per_block
+    fids = 1_000_000 + rng.permutation(farmers * 10)[:farmers]
+
+    farmer_crops = rng.integers(0, len(CROPS), (farmers, max(1, crops_per_farmer)))
+    crop_pick = rng.integers(0, farmer_crops.shape[1], rows)
+    event = datetime(2024, 9, 1) + timedelta(days=int(rng.integers(0, 30)))
+
+    return pd.DataFrame({
+        "Block": [f"Block{b}" for b in block_no],
+        "Village": [f"V{v % villages_per_block + 1}" for v in village_no],
+        "FID": fids[farmer_no],
+        "Farmer Name": [f"Farmer {n}" for n in farmer_no],
+        "Contact Number": 9_800_000_000 + farmer_no,
+        "Saksham ID": [f"HR-2024-{n}" for n in rng.integers(1000, 99999, rows)],
+        "Intimation_Application id": [f"0506{n:015d}" for n in rng.integers(0, 10**15, rows)],
+        "Crop": np.asarray(CROPS)[farmer_crops[farmer_no, crop_pick]],
+        "Survey Number": [f"{a}//{b}" for a, b in rng.integers(1, 300, (rows, 2))],
+        "Crop Area": rng.random(rows).round(4),
+        "Event occurred Date": event,
+        "Date of Intimation": event + timedelta(days=2),
+    })[LAYOUT_COLUMNS]
+
+
+def write_workbook(df, path):
+    # openpyxl's write-only mode streams rows, so 500k-row sheets stay quick
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(df.columns))
+    for row in df.itertuples(index=False):
+        ws.append([value.to_pydatetime() if isinstance(value, pd.Timestamp) else value for value in row])
+    wb.save(path)
+
+
+def placeholder_assets(target_dir):
+    # Blank versions of every images/*.PNG the registered layouts declare, plus a
+    # stand-in for fonts/Helvetica.ttf (ReportLab's bundled Vera). Existing
+    # files are left alone, so pointing this at the app folder is harmless.
+    from PIL import Image
+    import reportlab
+
+    target_dir = Path(target_dir)
+    (target_dir / "images").mkdir(parents=True, exist_ok=True)
+    (target_dir / "fonts").mkdir(parents=True, exist_ok=True)
+    names = {name for spec in registry.specs() for name in spec.asset_files()}
+    for name in sorted(names):
+        path = target_dir / "images" / name
+        if not path.exists():
+            Image.new("RGB", (400, 80), "white").save(path)
+    font = target_dir / "fonts" / "Helvetica.ttf"
+    if not font.exists():
+        shutil.copy(Path(reportlab.__file__).parent / "fonts" / "Vera.ttf", font)
+    return target_dir
+
+
+def add_sheet_arguments(parser):
+    parser.add_argument("--rows", type=int, default=10_000, help="Data rows (10 to 500000)")
+    parser.add_argument("--farmers-per-village", type=int, default=20)
+    parser.add_argument("--villages-per-block", type=int, default=10)
+    parser.add_argument("--crops-per-farmer", type=int, default=2)
+    parser.add_argument("--rows-per-farmer", type=float, default=6, help="Mean rows per farmer")
+    parser.add_argument("--skew", type=float, default=0.75,
+                        help="Spread of rows per farmer (log-normal sigma, 0 = all equal)")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def sheet_from_args(args):
+    return synthetic_sheet(args.rows, args.farmers_per_village, args.villages_per_block, args.crops_per_farmer,
+                           args.rows_per_farmer, args.skew, args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="Workbook to write (.xlsx)")
+    add_sheet_arguments(parser)
+    parser.add_argument("--assets", metavar="DIR", help="Also create placeholder images/ and fonts/ in DIR")
+    args = parser.parse_args(argv)
+
+    df = sheet_from_args(args)
+    write_workbook(df, args.output)
+    print(f"{args.output}: {len(df)} rows, {df['FID'].nunique()} farmers, "
+          f"{df[['Block', 'Village']].drop_duplicates().shape[0]} villages, "
+          f"{os.path.getsize(args.output) / 2**20:.1f} MB")
+    if args.assets:
+        placeholder_assets(args.assets)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import os
+import tarfile
+import time
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from common.batch import collect_trace, default_workers, first_job, load_layout, map_in_order, render_job_in_memory
+from common.profiling import stage
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+
+
+class _ZipWriter:
+    def __init__(self, path):
+        self.archive = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+
+    def add(self, name, data):
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self.archive.writestr(info, data)
+
+    def close(self):
+        self.archive.close()
+
+
+class _TarWriter:
+    def __init__(self, path, mode):
+        self.archive = tarfile.open(path, mode)
+
+    def add(self, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = time.time()
+        self.archive.addfile(info, BytesIO(data))
+
+    def close(self):
+        self.archive.close()
+
+
+def _open_archive(archive_path, target):
+    # The type comes from archive_path's name; the data goes to target
+    name = Path(archive_path).name.lower()
+    if name.endswith(".zip"):
+        return _ZipWriter(target)
+    if name.endswith((".tar.gz", ".tgz")):
+        return _TarWriter(target, "w:gz")
+    if name.endswith(".tar"):
+        return _TarWriter(target, "w")
+    raise ValueError(f"Unsupported archive type '{Path(archive_path).name}'. "
+                     f"Use one of: {', '.join(ARCHIVE_SUFFIXES)}")
+
+
+def _entry_name(name, taken):
+    # name, or "name (2).pdf", "name (3).pdf", ... if an earlier entry already
+    # has it; compared case-insensitively, as on the Windows machines that unpack them
+    stem, suffix = os.path.splitext(name)
+    candidate, n = name, 1
+    while candidate.casefold() in taken:
+        n += 1
+        candidate = f"{stem} ({n}){suffix}"
+    taken.add(candidate.casefold())
+    return candidate
+
+
+def run_archive(jobs, archive_path, workers=1, on_result=None, should_stop=None):
+    # Same call shape as run_jobs, but every farmer's PDF is rendered in
+    # memory and written straight into one .zip / .tar / .tar.gz archive under
+    # its usual file name (numbered if two farmers would otherwise share an
+    # entry); nothing else is written to disk. The archive is built next to
+    # archive_path and only moved into place once complete, so a cancelled or
+    # failed run never leaves a half-written archive behind.
+    # jobs may be a generator (see batch.iter_jobs); at most two PDFs per
+    # worker are rendered ahead of the writer, so memory stays flat however
+    # big the village is.
+    first, jobs = first_job(jobs)
+    if first is None:
+        return []
+    load_layout(first.layout_name)  # fail fast on a bad layout name
+
+    archive_path = Path(archive_path)
+    tmp_path = archive_path.with_name(archive_path.name + ".part")
+    archive = _open_archive(archive_path, tmp_path)
+    results = []
+    taken = set()
+    try:
+        for result, data in map_in_order(render_job_in_memory, jobs, workers or default_workers(), should_stop):
+            collect_trace(result)
+            if data is not None:
+                with stage("archive.add") as span:
+                    span.bytes = len(data)
+                    archive.add(_entry_name(Path(result.save_path).name, taken), data)
+                result.save_path = archive_path
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+        archive.close()
+    except BaseException:
+        archive.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    cancelled = should_stop is not None and should_stop()
+    if cancelled or all(r.error for r in results):
+        tmp_path.unlink(missing_ok=True)  # cancelled, or nothing to keep
+    else:
+        os.replace(tmp_path, archive_path)
+    return results
@@ -0,0 +1,77 @@
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Image
+
+# Process-wide image registry. Each PNG under images/ is opened and decoded
+# once; every Image flowable of the same path and size is shared across
+# pages and documents. Images only ever get wrapped and drawn, never
+# mutated, so sharing a flowable between stories is safe.
+_readers = {}   # path -> ImageReader holding the decoded pixels
+_images = {}    # (path, width, height) -> StaticArt flowable
+_stats = {"hits": 0, "misses": 0, "decodes": 0}
+
+
+def image_reader(path):
+    reader = _readers.get(path)
+    if reader is None:
+        reader = ImageReader(path)
+        reader.getRGBData()  # decode now so later documents reuse the pixel data
+        _readers[path] = reader
+        _stats["decodes"] += 1
+    return reader
+
+
+class StaticArt(Image):
+    # The layouts' images are fixed artwork (titles, labels, page backgrounds,
+    # signature boxes). On an ArtFormCanvas the first use in a document
+    # records the art as a named form XObject and every use after that, on
+    # any page, is a single reference to the form instead of a drawImage that
+    # re-hashes the pixels. Elsewhere it draws as a plain image.
+
+    def __init__(self, path, width, height, form_name):
+        super().__init__(path, width=width, height=height)
+        self.form_name = form_name
+
+    def draw(self):
+        canv = self.canv
+        if not getattr(canv, "static_art_forms", False):
+            super().draw()
+            return
+        if not canv.hasForm(self.form_name):
+            # 1pt slack so the form clip never trims anti-aliased edge pixels
+            canv.beginForm(self.form_name, -1, -1, self.drawWidth + 1, self.drawHeight + 1)
+            super().draw()
+            canv.endForm()
+        canv.doForm(self.form_name)
+
+
+class ArtFormCanvas(Canvas):
+    # For long documents that repeat the same art on many pages (merged
+    # village files). A form costs an extra object in the file, so short
+    # per-farmer documents are better off with plain images.
+    static_art_forms = True
+
+
+def cached_image(path, width=None, height=None):
+    key = (path, width, height)
+    image = _images.get(key)
+    if image is not None:
+        _stats["hits"] += 1
+        return image
+
+    _stats["misses"] += 1
+    image = StaticArt(path, width, height, f"StaticArt{len(_images)}")
+    image._img = image_reader(path)
+    _images[key] = image
+    return image
+
+
+def asset_stats():
+    return dict(_stats)
+
+
+def clear_asset_cache():
+    _readers.clear()
+    _images.clear()
+    for key in _stats:
+        _stats[key] = 0
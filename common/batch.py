@@ -0,0 +1,535 @@
+import os
+import tempfile
+import time
+from collections import deque
+from itertools import chain, groupby, islice
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from common.data_transform import cell_text
+from common.sheet_index import SheetIndex
+from common.assets import asset_stats
+from common.pdf_builder import generate_merged_pdf
+from common.manifest import Manifest, job_digest, village_digest
+from common.pagination import farmer_page_count
+from common import profiling
+from layouts import registry
+
+@dataclass
+class FarmerJob:
+    layout_name: str
+    rows: pd.DataFrame  # only this farmer's slice of the sheet
+    save_path: Path
+    block: str
+    village: str
+    fid: str
+    farmer: str
+    options: dict = field(default_factory=dict)  # extra keyword arguments for layout.generate_pdf
+    # Pre-transformed rows and [(crop, transformed rows, rows)]; see iter_farmers
+    transformed: pd.DataFrame = None
+    crop_groups: list = None
+
+
+@dataclass
+class FarmerResult:
+    block: str
+    village: str
+    fid: str
+    farmer: str
+    save_path: Path
+    seconds: float = 0.0
+    error: str = ""
+    image_hits: int = 0     # image registry lookups served from cache
+    image_decodes: int = 0  # PNGs actually opened and decoded for this farmer
+    pages: tuple = None     # (first, last) page inside a merged village file
+    skipped: bool = False   # incremental run: output already up to date, not rendered
+    trace: list = None      # profiling events recorded while rendering, handed back from pool workers
+
+
+def load_layout(layout_name):
+    # (layout module, transform) for a registered layout (see layouts/registry.py).
+    # Modules are imported on demand so headless runs never touch PyQt5.
+    spec = registry.get(layout_name)
+    return spec.load(), spec.transform
+
+
+def layout_version(layout_name):
+    return registry.get(layout_name).version
+
+
+def iter_farmers(df, spec, block=None, village=None, fid=None, index=None):
+    # Yields (block, village, fid, farmer name, rows, transformed rows, crop
+    # groups) for the layout described by spec (a registry.LayoutSpec),
+    # optionally narrowed to a single block / village / farmer ID.
+    # Blocks and villages come in sorted order, farmers in sheet order within
+    # a village. Each village is taken out of the sheet and transformed once,
+    # then split into farmers (contiguous slices) and (farmer, crop) groups
+    # with a single groupby, so nothing is re-filtered or re-transformed per
+    # farmer. crop groups are [(crop, transformed rows, rows)] in the order
+    # the crops first appear for that farmer. The transformed serial column
+    # counts across the village; the layouts number their own table rows.
+    # A village is only split when its first farmer is asked for and a
+    # farmer's slices only taken when it is yielded, so consumers that pull
+    # farmers as they render hold no more than the villages in flight.
+    if index is None:
+        index = SheetIndex(df)
+
+    blocks = index.blocks() if block is None else [block]
+    for cur_block in blocks:
+        villages = index.villages(cur_block) if village is None else [village]
+        for cur_village in villages:
+            farmers = index.farmer_groups(cur_block, cur_village, fid)
+            if not farmers:
+                continue
+            with profiling.stage("split_village", block=str(cur_block), village=str(cur_village)):
+                sizes = [len(positions) for _, _, positions in farmers]
+                village_rows = df.iloc[np.concatenate([positions for _, _, positions in farmers])]
+                # Plain values from here on: farmer slices are pickled into pool workers,
+                # and a categorical slice would carry the whole sheet's categories along.
+                categorical = [col for col in village_rows.columns
+                               if isinstance(village_rows[col].dtype, pd.CategoricalDtype)]
+                village_rows = village_rows.assign(**{col: np.asarray(village_rows[col]) for col in categorical})
+                # All display text: as plain objects (what pandas 2 gives anyway) rather
+                # than pandas 3's per-column Arrow strings, farmer and crop slices are cheap
+                village_transformed = spec.transform(village_rows).astype(object)
+
+                farmer_of_row = np.repeat(np.arange(len(farmers)), sizes)
+                crop_positions = [[] for _ in farmers]
+                by_crop = village_transformed.groupby(
+                    [farmer_of_row, village_transformed[spec.crop_column].to_numpy()], sort=False
+                ).indices
+                for (farmer_no, crop), local in sorted(by_crop.items(), key=lambda item: item[1][0]):
+                    crop_positions[farmer_no].append((crop, local))
+
+            start = 0
+            for (cur_fid, cur_name, _), size, crops in zip(farmers, sizes, crop_positions):
+                end = start + size
+                rows = village_rows.iloc[start:end]
+                transformed = village_transformed.iloc[start:end]
+                yield (cur_block, cur_village, cur_fid, cur_name,
+                       rows, transformed, _crop_groups(crops, start, rows, transformed))
+                start = end
+
+
+def _crop_groups(crops, start, rows, transformed):
+    # [(crop, transformed rows, rows)] of one farmer whose rows begin at
+    # position start of the village; crops: [(crop, village positions)].
+    # A single crop reuses the farmer's own slices, and a crop whose rows are
+    # contiguous is sliced rather than copied row by row.
+    if len(crops) == 1:
+        return [(crops[0][0], transformed, rows)]
+    groups = []
+    for crop, local in crops:
+        local = local - start
+        if local[-1] - local[0] + 1 == len(local):
+            local = slice(local[0], local[-1] + 1)
+        groups.append((crop, transformed.iloc[local], rows.iloc[local]))
+    return groups
+
+
+def render_farmer(layout_name, df_final_filtered, save_path, block, village, fid, farmer, options=None,
+                  df_transformed=None, crop_groups=None):
+    # Writes save_path; with save_path=None the PDF is returned as bytes instead
+    layout, transform = load_layout(layout_name)
+    contact = cell_text(df_final_filtered["Contact Number"].iloc[0])
+    if df_transformed is None:
+        df_transformed = transform(df_final_filtered)
+    if save_path is None:
+        return layout.render_pdf(
+            df_transformed, block, village, fid, farmer, contact, df_final_filtered,
+            crop_groups=crop_groups, **(options or {})
+        )
+    layout.generate_pdf(
+        df_transformed, save_path, block, village, fid, farmer, contact, df_final_filtered,
+        crop_groups=crop_groups, **(options or {})
+    )
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def file_fid(index, block, village, fid, farmer):
+    # The FID as it goes into output file names. Farmers of a village can
+    # share an FID; they then get their name added so each has a file (and a
+    # manifest entry) of its own.
+    if len(index.farmers(block, village, fid)) > 1:
+        return f"{fid} {farmer}"
+    return fid
+
+
+def iter_jobs(df, layout_name, out_dir, block=None, village=None, fid=None,
+              file_name="{block} {village} {fid}.pdf", index=None, options=None):
+    # FarmerJobs planned one at a time (see iter_farmers). run_jobs,
+    # run_archive and print_jobs take this generator as it is and start
+    # rendering with the first farmer instead of planning the whole selection.
+    out_dir = Path(out_dir)
+    spec = registry.get(layout_name)
+    if index is None:
+        index = SheetIndex(df)
+    for cur_block, cur_village, cur_fid, cur_name, rows, transformed, crop_groups \
+            in iter_farmers(df, spec, block, village, fid, index):
+        name = file_name.format(block=cur_block, village=cur_village,
+                                fid=file_fid(index, cur_block, cur_village, cur_fid, cur_name))
+        yield FarmerJob(layout_name, rows, out_dir / name, cur_block, cur_village, cur_fid, cur_name,
+                        dict(options or {}), transformed, crop_groups)
+
+
+def plan_jobs(df, layout_name, out_dir, block=None, village=None, fid=None,
+              file_name="{block} {village} {fid}.pdf", index=None, options=None):
+    # Every job up front, for callers that need the whole list (merged
+    # villages, estimates); prefer iter_jobs for rendering
+    return list(iter_jobs(df, layout_name, out_dir, block, village, fid, file_name, index, options))
+
+
+def job_group_rows(job):
+    # Rows of each crop group, in the order the layout pages them
+    if job.crop_groups is not None:
+        return [len(crop_df) for _, crop_df, _ in job.crop_groups]
+    return job.rows.groupby("Crop", dropna=False, sort=False, observed=True).size().tolist()
+
+
+def job_pages(job):
+    # Pages job's PDF will have (see common/pagination.py), without rendering it
+    return farmer_page_count(registry.get(job.layout_name), job_group_rows(job))
+
+
+def estimate_output(jobs, merge_village=False, measure=True):
+    # {"documents", "pages", "bytes"} a batch will produce, before rendering it.
+    # Page counts are exact. Bytes come from rendering the jobs with the fewest
+    # and the most pages in memory and fitting bytes = per document + per page
+    # * pages, so they are an estimate; merged village files share their
+    # artwork between farmers and usually come out smaller. measure=False
+    # skips those two renders and leaves bytes None (as does a failed render).
+    pages = [job_pages(job) for job in jobs]
+    documents = len({(job.block, job.village) for job in jobs}) if merge_village else len(jobs)
+    estimate = {"documents": documents, "pages": sum(pages), "bytes": None}
+    if not measure or not jobs:
+        return estimate
+
+    small = min(range(len(jobs)), key=pages.__getitem__)
+    large = max(range(len(jobs)), key=pages.__getitem__)
+    sizes = {}
+    for i in {small, large}:
+        result, data = render_job_in_memory(jobs[i])
+        collect_trace(result)
+        if data is None:
+            return estimate
+        sizes[i] = len(data)
+    if pages[large] > pages[small]:
+        per_page = (sizes[large] - sizes[small]) / (pages[large] - pages[small])
+    else:
+        per_page = sizes[small] / pages[small]
+    per_document = max(sizes[small] - per_page * pages[small], 0.0)
+    estimate["bytes"] = round(documents * per_document + per_page * estimate["pages"])
+    return estimate
+
+
+def _render_job(job, in_memory):
+    result = FarmerResult(job.block, job.village, job.fid, job.farmer, job.save_path)
+    data = None
+    stats_before = asset_stats()
+    start = time.perf_counter()
+    try:
+        with profiling.farmer(f"{job.fid} {job.farmer}"), profiling.stage("render_farmer"):
+            data = render_farmer(job.layout_name, job.rows, None if in_memory else job.save_path,
+                                 job.block, job.village, job.fid, job.farmer,
+                                 job.options, job.transformed, job.crop_groups)
+    except Exception as e:
+        result.error = str(e) or type(e).__name__
+    result.seconds = time.perf_counter() - start
+    if profiling.is_enabled():
+        result.trace = profiling.drain()
+    stats_after = asset_stats()
+    result.image_hits = stats_after["hits"] - stats_before["hits"]
+    result.image_decodes = stats_after["decodes"] - stats_before["decodes"]
+    return result, data
+
+
+# Module-level so they can be pickled into pool workers
+def _run_job(job):
+    return _render_job(job, in_memory=False)[0]
+
+
+def render_job_in_memory(job):
+    # (result, PDF bytes or None if it failed); job.save_path is not written
+    return _render_job(job, in_memory=True)
+
+
+def make_pool(workers):
+    # Process pool whose workers profile when this process does
+    return ProcessPoolExecutor(max_workers=workers, initializer=profiling.init_worker,
+                               initargs=(profiling.is_enabled(),))
+
+
+def first_job(jobs):
+    # (first job or None, iterator over all the jobs including it), so a
+    # generator can be checked before it is handed on
+    jobs = iter(jobs)
+    first = next(jobs, None)
+    return first, chain([] if first is None else [first], jobs)
+
+
+def map_in_order(func, jobs, workers=1, should_stop=None):
+    # Yields func(job) for each job in job order, across a pool of up to
+    # workers processes. jobs is consumed lazily: at most two jobs per worker
+    # are planned and in flight ahead of the consumer, so memory stays flat
+    # however many farmers there are. Stops early once should_stop returns True.
+    queued = iter(jobs)
+    ahead = list(islice(queued, 2 * workers)) if workers > 1 else []
+    if len(ahead) <= 1:
+        for job in chain(ahead, queued):
+            if should_stop is not None and should_stop():
+                return
+            yield func(job)
+        return
+
+    # A short selection needs no more processes than it has jobs
+    pool = make_pool(min(workers, len(ahead)))
+    try:
+        pending = deque(pool.submit(func, job) for job in ahead)
+        while pending:
+            if should_stop is not None and should_stop():
+                return
+            done = pending.popleft().result()
+            job = next(queued, None)
+            if job is not None:
+                pending.append(pool.submit(func, job))
+            yield done
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def collect_trace(result):
+    # Moves the profiling events a job recorded into this process's profile
+    profiling.merge(result.trace)
+    result.trace = None
+    return result
+
+
+def run_jobs(jobs, workers=1, on_result=None, should_stop=None):
+    # Renders jobs (a list or a generator such as iter_jobs) across a process
+    # pool; results come back in job order. should_stop is polled between
+    # farmers; pending jobs are dropped once it returns True.
+    first, jobs = first_job(jobs)
+    if first is None:
+        return []
+    load_layout(first.layout_name)  # fail fast on a bad layout name
+
+    results = []
+    for result in map_in_order(_run_job, jobs, workers or default_workers(), should_stop):
+        collect_trace(result)
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+    return results
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def run_merged(jobs, save_path, workers=1, on_result=None, should_stop=None):
+    # Builds every farmer of a village into one document with an outline entry
+    # per farmer. Same call shape as run_jobs, but a single document is built
+    # by a single process so workers is unused. Failed farmers are reported as
+    # soon as their flowables fail; the rest as their pages are drawn. Once
+    # should_stop returns True the unfinished document is deleted and only
+    # the failed farmers come back, so the results match what is on disk.
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    layout, transform = load_layout(jobs[0].layout_name)
+
+    results = []
+    sections = []
+    pending = {}
+    for i, job in enumerate(jobs):
+        if should_stop is not None and should_stop():
+            return [r for r in results if r.error]
+        result = FarmerResult(job.block, job.village, job.fid, job.farmer, Path(save_path))
+        stats_before = asset_stats()
+        start = time.perf_counter()
+        try:
+            with profiling.farmer(f"{job.fid} {job.farmer}"), profiling.stage("build_elements"):
+                contact = cell_text(job.rows["Contact Number"].iloc[0])
+                df_transformed = job.transformed if job.transformed is not None else transform(job.rows)
+                elements = layout.build_elements(
+                    df_transformed, job.block, job.village, job.fid, job.farmer, contact, job.rows,
+                    crop_groups=job.crop_groups, **job.options
+                )
+            key = f"farmer{i}"
+            sections.append((key, f"{job.fid} {job.farmer}", elements))
+            pending[key] = result
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+            if on_result is not None:
+                on_result(result)
+        result.seconds = time.perf_counter() - start
+        stats_after = asset_stats()
+        result.image_hits = stats_after["hits"] - stats_before["hits"]
+        result.image_decodes = stats_after["decodes"] - stats_before["decodes"]
+        results.append(result)
+
+    if not sections:
+        return results
+
+    drawing = []  # [key, started at] of the farmer currently being drawn
+    reported = set()
+
+    def finish_current():
+        key, started = drawing
+        result = pending[key]
+        result.seconds += time.perf_counter() - started
+        reported.add(key)
+        if on_result is not None:
+            on_result(result)
+
+    def on_section_start(key, page):
+        if drawing:
+            finish_current()
+        if should_stop is not None and should_stop():
+            raise _Cancelled()
+        drawing[:] = [key, time.perf_counter()]
+
+    try:
+        page_ranges = generate_merged_pdf(sections, save_path, layout.DOC_MARGINS, on_section_start)
+    except _Cancelled:
+        Path(save_path).unlink(missing_ok=True)
+        return [r for r in results if r.error]
+    except Exception as e:
+        for key, result in pending.items():
+            result.error = f"Merged document failed: {e}"
+            if on_result is not None and key not in reported:
+                on_result(result)
+        return results
+
+    finish_current()
+    for key, result in pending.items():
+        result.pages = page_ranges[key]
+    return results
+
+
+def compare_with_per_farmer(jobs, merged_path, merged_seconds):
+    # Renders the same jobs as separate files in a scratch directory and
+    # reports how much the merged village file saves.
+    with tempfile.TemporaryDirectory() as tmp:
+        single_jobs = [
+            FarmerJob(job.layout_name, job.rows, Path(tmp) / f"{i}.pdf", job.block, job.village,
+                      job.fid, job.farmer, job.options)
+            for i, job in enumerate(jobs)
+        ]
+        start = time.perf_counter()
+        run_jobs(single_jobs, workers=1)
+        per_farmer_seconds = time.perf_counter() - start
+        per_farmer_bytes = sum(p.stat().st_size for p in Path(tmp).glob("*.pdf"))
+
+    return {
+        "merged_bytes": Path(merged_path).stat().st_size,
+        "merged_seconds": merged_seconds,
+        "per_farmer_bytes": per_farmer_bytes,
+        "per_farmer_seconds": per_farmer_seconds,
+    }
+
+
+def _skipped(jobs, save_path=None):
+    return [
+        FarmerResult(job.block, job.village, job.fid, job.farmer, save_path or job.save_path, skipped=True)
+        for job in jobs
+    ]
+
+
+def run_batch(df, layout_name, out_dir, block=None, village=None, fid=None, workers=1, on_result=None,
+              options=None, merge_village=False, on_village=None, incremental=False, on_removed=None,
+              should_stop=None):
+    # incremental: consult the output directory's manifest, only render PDFs
+    # whose inputs changed (or that are missing) and delete recorded PDFs this
+    # run no longer produces. Up-to-date farmers come back with skipped=True
+    # and are not passed to on_result; deleted files go to on_removed.
+    # should_stop: polled between farmers (between villages, and while one is
+    # drawn, with merge_village). A stopped run returns the results of what
+    # was written; the village being merged when it stopped is discarded.
+    # Its manifest is saved, but nothing is removed as stale.
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = iter_jobs(df, layout_name, out_dir, block, village, fid, options=options)
+
+    manifest = version = None
+    if incremental:
+        manifest = Manifest(out_dir)
+        version = layout_version(layout_name)
+
+    results = []
+    outputs = []
+    if not merge_village:
+        digests = {}
+        skipped = []
+        clashes = []
+        written = {}  # case-folded file name -> farmer, as Windows compares them
+
+        def todo():
+            # Up-to-date farmers are filtered out as the jobs are planned, and a
+            # farmer whose file would overwrite another's is reported, not rendered
+            for job in jobs:
+                key = job.save_path.name.casefold()
+                if key in written:
+                    clash = FarmerResult(job.block, job.village, job.fid, job.farmer, job.save_path,
+                                         error=f"Same file name as farmer '{written[key]}'")
+                    clashes.append(clash)
+                    if on_result is not None:
+                        on_result(clash)
+                    continue
+                written[key] = job.farmer
+                outputs.append(job.save_path)
+                if manifest is not None:
+                    digests[job.save_path] = job_digest(job, version)
+                    if manifest.is_current(job.save_path, digests[job.save_path]):
+                        skipped.extend(_skipped([job]))
+                        continue
+                yield job
+
+        rendered = run_jobs(todo(), workers=workers, on_result=on_result, should_stop=should_stop)
+        results += skipped
+        if manifest is not None:
+            for result in rendered:
+                if result.error:
+                    manifest.forget(result.save_path)
+                else:
+                    manifest.record(result.save_path, digests[result.save_path], layout_name, version,
+                                    result.block, result.village, result.fid, result.farmer)
+        results += rendered + clashes
+    else:
+        for (cur_block, cur_village), village_jobs in groupby(jobs, key=lambda j: (j.block, j.village)):
+            if should_stop is not None and should_stop():
+                break
+            village_jobs = list(village_jobs)
+            save_path = out_dir / f"{cur_block} {cur_village}.pdf"
+            outputs.append(save_path)
+            if manifest is not None:
+                digest = village_digest(village_jobs, version)
+                if manifest.is_current(save_path, digest):
+                    results += _skipped(village_jobs, save_path)
+                    continue
+            start = time.perf_counter()
+            village_results = run_merged(village_jobs, save_path, on_result=on_result, should_stop=should_stop)
+            if should_stop is not None and should_stop():
+                results += village_results  # only its failed farmers; the document was not kept
+                break
+            if on_village is not None:
+                on_village(save_path, village_jobs, village_results, time.perf_counter() - start)
+            if manifest is not None:
+                if any(r.error for r in village_results):
+                    manifest.forget(save_path)
+                else:
+                    manifest.record(save_path, digest, layout_name, version, cur_block, cur_village)
+            results += village_results
+
+    if manifest is not None:
+        if should_stop is None or not should_stop():
+            for path in manifest.remove_stale(outputs, block, village, fid):
+                if on_removed is not None:
+                    on_removed(path)
+        manifest.save()
+    return results
@@ -1,43 +1,58 @@
-from PyQt5.QtWidgets import QMessageBox
 import pandas as pd
+from common.profiling import profiled
+from layouts.registry import get as get_layout
+
+def cell_text(value):
+    # Display text for one sheet value: blanks/NaN/NaT -> "", midnight
+    # timestamps as the bare date (as a datetime column's astype(str) shows them)
+    if pd.isna(value):
+        return ""
+    if isinstance(value, pd.Timestamp) and value == value.normalize():
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+def display_text(series: pd.Series) -> pd.Series:
+    # Vectorized cell_text for a whole column (without the date special case:
+    # transformed tables carry no dates)
+    return series.astype(str).where(series.notna(), "")
+
+def display_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # Vectorized df.map(lambda x: "" if pd.isna(x) else str(x))
+    return pd.DataFrame({col: display_text(df[col]) for col in df.columns}, index=df.index)
+
+def cls_number(saksham_id: pd.Series) -> pd.Series:
+    # "HR-2024-1234" -> "1234"; IDs without a dash are kept whole
+    return saksham_id.astype(str).str.replace(r"^.*-", "", regex=True)
+
+# Transforms are column-wise, so they can run once over a whole village or
+# district and the result sliced per farmer afterwards. Every column comes
+# out as display text.
+@profiled("transform")
+def transform_columns(df_final_filtered: pd.DataFrame, columns):
+    # columns: a layout's column map, [(table column, sheet column, kind)]
+    # (see layouts/registry.py)
+    if df_final_filtered is None or df_final_filtered.empty:
+        return None
+
+    df = df_final_filtered
+    transformed = {}
+    for name, source, kind in columns:
+        if kind == "serial":
+            transformed[name] = display_text(pd.Series(range(1, len(df) + 1), index=df.index))
+        elif kind == "cls":
+            transformed[name] = cls_number(df[source])
+        elif kind == "text":
+            transformed[name] = display_text(df[source])
+        elif kind == "blank":
+            transformed[name] = ""
+        else:
+            raise ValueError(f"Unknown column kind '{kind}' for '{name}'")
+    return pd.DataFrame(transformed)
+
 
 def transform_filtered_data(df_final_filtered: pd.DataFrame):
-        if df_final_filtered is None or df_final_filtered.empty:
-            return None
-
-        df = df_final_filtered.copy()
-
-        # Build the output DataFrame
-        transformed = pd.DataFrame({
-            "क्र.सं.": range(1, len(df) + 1),
-            "सीएलएस नंबर": df["Saksham ID"].astype(str).apply(lambda x: x.split("-")[-1] if "-" in x else x),
-            "आवेदन संख्या": df["Intimation_Application id"],
-            "फसल का नाम": df["Crop"],
-            "सर्वे/उप सर्वे नंबर": df["Survey Number"],
-            "प्रभावित क्षेत्र (हेक्टेयर में)": df["Crop Area"],
-            "हानि प्रतिशत": "",
-            "रिमार्क": ""
-        })
-
-        return transformed
-    
+    return get_layout("Layout1").transform(df_final_filtered)
+
+
 def transform_filtered_data2(df_final_filtered: pd.DataFrame):
-        if df_final_filtered is None or df_final_filtered.empty:
-            return None
-
-        df = df_final_filtered.copy()
-
-        # Build the output DataFrame
-        transformed = pd.DataFrame({
-            "क्र.सं.": range(1, len(df) + 1),
-            "आवेदन संख्या": df["Intimation_Application id"],
-            "सीएलएस नंबर / टिकट संख्या (वैकल्पिक)": df["Saksham ID"].astype(str).apply(lambda x: x.split("-")[-1] if "-" in x else x),
-            "भूमि सर्वेक्षण . किला नं.": df["Survey Number"],
-            "बीमित क्षेत्र": df["Crop Area"],
-            "प्रभावित क्षेत्र (% में)": "",
-            "प्रभावित क्षेत्र में नुकसान (% में)": "",
-            "टिप्पणी (यदि कोई है)": "",
-            "फसल का नाम": df["Crop"]
-        })
-
-        return transformed    
\ No newline at end of file
+    return get_layout("Layout2").transform(df_final_filtered)
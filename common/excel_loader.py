@@ -0,0 +1,177 @@
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+from common.profiling import profiled
+
+# Columns the UI and the layouts need; every other column in the export is skipped.
+REQUIRED_COLUMNS = ["Block", "Village", "FID", "Farmer Name"]
+LAYOUT_COLUMNS = REQUIRED_COLUMNS + [
+    "Contact Number",
+    "Saksham ID",
+    "Intimation_Application id",
+    "Crop",
+    "Survey Number",
+    "Crop Area",
+    "Event occurred Date",
+    "Date of Intimation",
+]
+
+
+# Loaded as pandas categoricals: few distinct values, compared by integer code
+CATEGORY_COLUMNS = ["Block", "Village", "FID", "Farmer Name", "Crop"]
+# Only ever displayed, so stored as plain text (also keeps the frame Arrow-friendly)
+TEXT_COLUMNS = ["Contact Number", "Saksham ID", "Intimation_Application id", "Survey Number"]
+DATE_COLUMNS = ["Event occurred Date", "Date of Intimation"]
+AREA_COLUMN = "Crop Area"
+
+
+class MissingColumnsError(ValueError):
+    pass
+
+
+def check_header(header):
+    missing = [col for col in REQUIRED_COLUMNS if col not in header]
+    if missing:
+        raise MissingColumnsError(
+            "Excel file must contain " + ", ".join(f"'{col}'" for col in missing) + " columns."
+        )
+
+
+def _convert_cell(value, error_codes):
+    # Same conversions pandas' openpyxl reader applies, so the result matches pd.read_excel
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        as_int = int(value)
+        return as_int if as_int == value else float(value)
+    if isinstance(value, str) and value in error_codes:
+        return np.nan
+    return value
+
+
+def _read_xlsx(file_path, columns):
+    from openpyxl import load_workbook
+    from openpyxl.cell.cell import ERROR_CODES
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [("" if h is None else str(h)) for h in next(rows, ())]
+        # Validate before touching any data rows
+        check_header(header)
+
+        positions = [i for i, name in enumerate(header) if name in columns]
+        # Collected column by column rather than as a list per row, which
+        # cost more than the values themselves on big sheets
+        values = [[] for _ in positions]
+        rows_with_data = 0
+        for n, row in enumerate(rows, 1):
+            blank = True
+            for column, i in zip(values, positions):
+                value = _convert_cell(row[i] if i < len(row) else None, ERROR_CODES)
+                column.append(value)
+                if value != "":
+                    blank = False
+            if not blank:
+                rows_with_data = n
+    finally:
+        wb.close()
+
+    # TextParser infers each column's type on its own, so parsing a column at
+    # a time gives what one pass over all the rows would (and pd.read_excel
+    # does); names are deduplicated the same way from the header alone.
+    # Trailing empty rows are trimmed like pd.read_excel does.
+    names = TextParser([[header[i] for i in positions]], header=0).read().columns
+    parsed = {}
+    for k, name in enumerate(names):
+        column, values[k] = values[k][:rows_with_data], None  # each raw column is freed once parsed
+        # Single-value rows: keep blank ones, which a row of several columns never counts as blank
+        parsed[name] = TextParser([[name]] + [[value] for value in column], header=0,
+                                  skip_blank_lines=False).read()[name]
+    return pd.DataFrame(parsed)
+
+
+def _read_other(file_path, columns):
+    # .xls (and anything openpyxl can't stream): check the header first, then
+    # let pandas parse only the needed columns.
+    header = list(pd.read_excel(file_path, sheet_name=0, nrows=0).columns.astype(str))
+    check_header(header)
+    return pd.read_excel(file_path, sheet_name=0, usecols=lambda col: str(col) in columns)
+
+
+def read_sheet(file_path, columns=LAYOUT_COLUMNS):
+    # First sheet of the workbook, only the given columns, blanks as "".
+    columns = set(columns)
+    if Path(file_path).suffix.lower() in (".xlsx", ".xlsm"):
+        df = _read_xlsx(file_path, columns)
+    else:
+        df = _read_other(file_path, columns)
+    return df.fillna("")
+
+
+def normalize_fid(x):
+    # Same normalization the UI has always applied to FIDs (1234.0 -> "1234")
+    if pd.isna(x):
+        return ""
+    if isinstance(x, (int, float)) and float(x).is_integer():
+        return str(int(x))
+    return str(x)
+
+
+def _is_blank_or(series, types):
+    return series.map(lambda x: x == "" or pd.isna(x) or isinstance(x, types)).all()
+
+
+def apply_column_types(df):
+    # Typed once at load so filtering and grouping compare integer codes and
+    # the layouts never have to re-parse numbers or dates.
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).astype("category")
+
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str)
+
+    if AREA_COLUMN in df.columns:
+        area = df[AREA_COLUMN]
+        if pd.api.types.is_numeric_dtype(area) or _is_blank_or(area, (int, float)):
+            # int64 when every area is a whole number and none is blank, as
+            # read_excel types it, so they still print as "1" rather than "1.0"
+            df[AREA_COLUMN] = pd.to_numeric(area.replace("", np.nan))
+        else:
+            df[AREA_COLUMN] = area.astype(str)  # free text in the export; keep it as typed
+
+    for col in DATE_COLUMNS:
+        if col not in df.columns or pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue
+        if _is_blank_or(df[col], (datetime, pd.Timestamp)):
+            df[col] = pd.to_datetime(df[col].replace("", pd.NaT))
+        else:
+            df[col] = df[col].astype(str)  # dates typed as text: show them exactly as written
+    return df
+
+
+@profiled("load_excel")
+def load_sheet(file_path):
+    # Streams only the columns the layouts use; raises MissingColumnsError early
+    df = read_sheet(file_path)
+    df["FID"] = df["FID"].apply(normalize_fid)
+    return apply_column_types(df)
+
+
+def measure_peak_memory(func, *args, **kwargs):
+    # Returns (result, peak bytes allocated while func ran). tracemalloc slows
+    # allocation-heavy code down noticeably, so only use it when asked to.
+    tracemalloc.start()
+    try:
+        result = func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
@@ -0,0 +1,184 @@
+from reportlab.lib import colors
+from reportlab.platypus import Flowable
+
+# ReportLab Table's default cell padding
+SIDE_PADDING = 6
+ROW_PADDING = 3
+
+
+class FixedGrid(Flowable):
+    # Fast stand-in for the layouts' data tables: a header row of flowables,
+    # text rows centred in a grid and an optional footer row of merged cells.
+    # Column x-positions and row y-positions are worked out once from the
+    # column widths and the leading, then everything is drawn straight onto
+    # the canvas. Positions, fonts and the order lines are stroked in follow
+    # Table's rules for the same style, so a page looks the same either way,
+    # but none of Table's per-cell measuring, style expansion or splitting
+    # runs. The grid never splits: callers already size it to fit a page.
+    #
+    #   header          flowables for row 0 (centred, like the Table header)
+    #   rows            lists of strings, one per column
+    #   col_font_sizes  {column: font size} where a column differs
+    #   merged_column   column whose body cells are merged into one (the
+    #                   first row's value is shown), like a SPAN over it
+    #   footer          [(first col, last col, cell, "LEFT"/"CENTER"/"RIGHT")],
+    #                   cell a flowable or string, drawn with no top/bottom
+    #                   padding and boxed separately from the body
+
+    def __init__(self, header, rows, col_widths, font_name="Helvetica", font_size=10, leading=12,
+                 col_font_sizes=None, merged_column=None, footer=None, line_width=0.5):
+        super().__init__()
+        self.hAlign = "CENTER"  # like Table
+        self.header = list(header)
+        self.rows = rows
+        self.col_widths = list(col_widths)
+        self.font_name = font_name
+        self.font_size = font_size
+        self.leading = leading
+        self.col_font_sizes = col_font_sizes or {}
+        self.merged_column = merged_column
+        self.footer = footer
+        self.line_width = line_width
+
+        self.col_x = [0]
+        for w in self.col_widths:
+            self.col_x.append(self.col_x[-1] + w)
+        self.width = self.col_x[-1]
+
+    def _cell_width(self, first, last):
+        return self.col_x[last + 1] - self.col_x[first]
+
+    def _flowable_size(self, cell, width):
+        return cell.wrapOn(self.canv if hasattr(self, "canv") else None, width - 2 * SIDE_PADDING, 72000)
+
+    def _layout(self):
+        heights = [max(self._flowable_size(cell, w)[1] for cell, w in zip(self.header, self.col_widths))
+                   + 2 * ROW_PADDING]
+        for row in self.rows:
+            lines = max(str(value).count("\n") for value in row) + 1
+            heights.append(lines * self.leading + 2 * ROW_PADDING)
+        if self.footer:
+            footer_height = 0
+            for first, last, cell, _ in self.footer:
+                if isinstance(cell, Flowable):
+                    footer_height = max(footer_height, self._flowable_size(cell, self._cell_width(first, last))[1])
+                else:
+                    footer_height = max(footer_height, (str(cell).count("\n") + 1) * self.leading)
+            heights.append(footer_height)
+
+        # Row tops and bottoms from the top edge down, as Table._rowpositions
+        self.row_y = [sum(heights)]
+        for h in heights:
+            self.row_y.append(self.row_y[-1] - h)
+        self.height = self.row_y[0]
+
+    def wrap(self, availWidth, availHeight):
+        self._layout()
+        return self.width, self.height
+
+    # Cells are vertically centred the way Table does VALIGN MIDDLE; top and
+    # bottom padding are equal so they cancel out of the formulas.
+    def _draw_flowable(self, cell, x0, width, y_bottom, height, align):
+        w, h = self._flowable_size(cell, width)
+        y = y_bottom + (height + h) / 2.0 - h
+        if align == "LEFT":
+            x = x0 + SIDE_PADDING
+        elif align == "RIGHT":
+            x = x0 + width - SIDE_PADDING - w
+        else:
+            x = x0 + (width - w) / 2.0
+        cell.drawOn(self.canv, x, y)
+
+    def _draw_text(self, value, x0, width, y_bottom, height, align, font_size):
+        lines = str(value).split("\n")
+        y = y_bottom + (height + len(lines) * self.leading) / 2.0 - font_size
+        if align == "LEFT":
+            draw, x = self.canv.drawString, x0 + SIDE_PADDING
+        elif align == "RIGHT":
+            draw, x = self.canv.drawRightString, x0 + width - SIDE_PADDING
+        else:
+            draw, x = self.canv.drawCentredString, x0 + width * 0.5
+        for line in lines:
+            draw(x, y, line)
+            y -= self.leading
+
+    def _hline(self, x0, x1, y, gap=None):
+        # Horizontal line, broken around a merged cell like Table's _hLine
+        if gap is None or x1 <= gap[0] or x0 >= gap[1]:
+            self.canv.line(x0, y, x1, y)
+            return
+        if gap[0] > x0:
+            self.canv.line(x0, y, gap[0], y)
+        if gap[1] < x1:
+            self.canv.line(gap[1], y, x1, y)
+
+    def _box(self, top, bottom):
+        # BOX part of a GRID command over rows top..bottom (row_y indexes)
+        canv, x, y = self.canv, self.col_x, self.row_y
+        canv.line(x[0], y[top], x[-1], y[top])
+        canv.line(x[0], y[bottom], x[-1], y[bottom])
+        canv.line(x[0], y[bottom], x[0], y[top])
+        canv.line(x[-1], y[bottom], x[-1], y[top])
+
+    def draw(self):
+        canv = self.canv
+        x, y = self.col_x, self.row_y
+        body_rows = len(self.rows) + 1
+        canv.saveState()
+        canv.setFillColor(colors.black)
+        canv.setFont(self.font_name, self.font_size, self.leading)
+
+        for col, cell in enumerate(self.header):
+            self._draw_flowable(cell, x[col], self.col_widths[col], y[1], y[0] - y[1], "CENTER")
+
+        current_size = self.font_size
+        for col in range(len(self.col_widths)):
+            size = self.col_font_sizes.get(col, self.font_size)
+            if size != current_size:
+                canv.setFont(self.font_name, size, self.leading)
+                current_size = size
+            if col == self.merged_column:
+                if self.rows and self.rows[0][col] != "":
+                    self._draw_text(self.rows[0][col], x[col], self.col_widths[col], y[body_rows],
+                                    y[1] - y[body_rows], "CENTER", size)
+                continue
+            for row_no, row in enumerate(self.rows, start=1):
+                if row[col] != "":
+                    self._draw_text(row[col], x[col], self.col_widths[col], y[row_no + 1],
+                                    y[row_no] - y[row_no + 1], "CENTER", size)
+        if current_size != self.font_size:
+            canv.setFont(self.font_name, self.font_size, self.leading)
+
+        if self.footer:
+            top, bottom = y[body_rows], y[body_rows + 1]
+            for first, last, cell, align in self.footer:
+                width = self._cell_width(first, last)
+                if isinstance(cell, Flowable):
+                    self._draw_flowable(cell, x[first], width, bottom, top - bottom, align)
+                elif cell != "":
+                    self._draw_text(cell, x[first], width, bottom, top - bottom, align, self.font_size)
+
+        canv.saveState()
+        canv.setLineCap(1)
+        canv.setLineJoin(1)
+        canv.setStrokeColor(colors.black)
+        canv.setLineWidth(self.line_width)
+
+        # Body grid: box, then inner horizontals, then inner verticals
+        self._box(0, body_rows)
+        gap = None
+        if self.merged_column is not None:
+            gap = (x[self.merged_column], x[self.merged_column + 1])
+        for row_no in range(1, body_rows):
+            self._hline(x[0], x[-1], y[row_no], gap if row_no > 1 else None)
+        for col in range(1, len(self.col_widths)):
+            canv.line(x[col], y[body_rows], x[col], y[0])
+
+        if self.footer:
+            self._box(body_rows, body_rows + 1)
+            starts = {first for first, _, _, _ in self.footer}
+            for col in range(1, len(self.col_widths)):
+                if col in starts:
+                    canv.line(x[col], y[body_rows + 1], x[col], y[body_rows])
+        canv.restoreState()
+        canv.restoreState()
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import pandas as pd
+
+# Kept inside the output directory; records what every generated PDF was
+# built from so a re-run can skip the ones whose inputs haven't changed.
+MANIFEST_NAME = ".smart-pdf-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def rows_digest(rows):
+    # Content hash of a farmer's sheet rows: column names plus every value,
+    # in order (the layouts number rows by position, so order matters too)
+    digest = hashlib.sha1("|".join(map(str, rows.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def job_digest(job, layout_version):
+    # Everything that ends up on the farmer's pages
+    header = json.dumps(
+        [job.layout_name, layout_version, job.options, job.block, job.village, job.fid, job.farmer],
+        sort_keys=True, default=str,
+    )
+    digest = hashlib.sha1(header.encode("utf-8"))
+    digest.update(rows_digest(job.rows).encode("ascii"))
+    return digest.hexdigest()
+
+
+def village_digest(jobs, layout_version):
+    # A merged village file changes when any of its farmers does, or when
+    # farmers are added, removed or reordered
+    digest = hashlib.sha1()
+    for job in jobs:
+        digest.update(job_digest(job, layout_version).encode("ascii"))
+    return digest.hexdigest()
+
+
+class Manifest:
+    # {file name: {"hash", "layout", "layout_version", "block", "village", "fid", "farmer"}}
+    # for the PDFs in one output directory. fid and farmer are None for merged
+    # village files. File names are unique per farmer (see batch.file_fid),
+    # so farmers sharing an FID have separate entries.
+
+    def __init__(self, out_dir):
+        self.out_dir = Path(out_dir)
+        self.path = self.out_dir / MANIFEST_NAME
+        self.entries = {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return  # no manifest yet, or unreadable: everything counts as changed
+        if data.get("version") == MANIFEST_VERSION:
+            self.entries = data.get("files", {})
+
+    def is_current(self, save_path, digest):
+        entry = self.entries.get(Path(save_path).name)
+        return entry is not None and entry["hash"] == digest and Path(save_path).exists()
+
+    def record(self, save_path, digest, layout_name, layout_version, block, village, fid=None, farmer=None):
+        self.entries[Path(save_path).name] = {
+            "hash": digest,
+            "layout": layout_name,
+            "layout_version": layout_version,
+            "block": block,
+            "village": village,
+            "fid": fid,
+            "farmer": farmer,
+        }
+
+    def forget(self, save_path):
+        self.entries.pop(Path(save_path).name, None)
+
+    def stale(self, keep, block=None, village=None, fid=None):
+        # Recorded files inside the block / village / fid scope of this run
+        # that the run no longer produces (the farmer or village is gone)
+        keep = {Path(p).name for p in keep}
+        return [
+            name for name, entry in self.entries.items()
+            if name not in keep
+            and (block is None or entry["block"] == block)
+            and (village is None or entry["village"] == village)
+            and (fid is None or entry["fid"] == fid)
+        ]
+
+    def remove_stale(self, keep, block=None, village=None, fid=None):
+        # Deletes stale PDFs (only ever files this manifest recorded); returns their paths
+        removed = []
+        for name in self.stale(keep, block, village, fid):
+            path = self.out_dir / name
+            path.unlink(missing_ok=True)
+            del self.entries[name]
+            removed.append(path)
+        return removed
+
+    def save(self):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"version": MANIFEST_VERSION, "files": self.entries}, ensure_ascii=False, indent=1),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+import numpy as np
+
+# Page plan of a farmer's data tables, worked out from row counts alone
+# before any flowable is built. A farmer's rows are split into crop groups;
+# each group starts on a new page holding spec.first_page_rows rows (the
+# page with the farmer details, Layout2) or spec.rows_per_page rows when
+# the layout has no table on its first page (Layout1, whose farmer gets a
+# single cover page instead), and continues on pages of spec.rows_per_page.
+# Every table is padded with blank rows to its page's capacity.
+
+
+@dataclass(frozen=True)
+class TablePage:
+    group: int           # crop group, in the order the farmer's crops first appear
+    start: int           # first row of the group on this page
+    stop: int            # one past the last; rows from stop to start + capacity are blank
+    capacity: int        # table rows drawn on the page
+    first_serial: int    # number in the serial column of the page's first row
+    opens_group: bool    # first page of the group
+    closes_group: bool   # last page of the group, where its total goes
+    last: bool = False   # last page of the farmer: no page break after it
+
+
+def group_pages(spec, rows, group=0):
+    # [TablePage] for one crop group of rows rows; always at least one page
+    pages = []
+    start = 0
+    capacity = spec.first_page_rows or spec.rows_per_page
+    while True:
+        stop = min(rows, start + capacity)
+        first_serial = 1 if spec.serials_per_page else start + 1
+        pages.append(TablePage(group, start, stop, capacity, first_serial,
+                               opens_group=not pages, closes_group=stop >= rows))
+        start += capacity
+        capacity = spec.rows_per_page
+        if start >= rows:
+            return pages
+
+
+def plan_pages(spec, group_rows):
+    # Table pages of a whole farmer; group_rows: rows per crop group
+    pages = [page for group, rows in enumerate(group_rows) for page in group_pages(spec, rows, group)]
+    if pages:
+        last = pages[-1]
+        pages[-1] = TablePage(last.group, last.start, last.stop, last.capacity, last.first_serial,
+                              last.opens_group, last.closes_group, last=True)
+    return pages
+
+
+def table_rows(page, values, width):
+    # The page's table body: its rows of values (row lists with the serial
+    # column first), renumbered and padded with blank rows to page.capacity
+    rows = []
+    for i in range(page.capacity):
+        row = list(values[page.start + i]) if page.start + i < page.stop else [""] * width
+        row[0] = str(page.first_serial + i)
+        rows.append(row)
+    return rows
+
+
+def group_page_counts(spec, group_rows):
+    # Pages per crop group, as group_pages would plan them, for an array of
+    # row counts at once (a whole village or sheet of groups)
+    rows = np.asarray(group_rows, dtype=np.int64)
+    first = spec.first_page_rows or spec.rows_per_page
+    return 1 + -(-np.maximum(rows - first, 0) // spec.rows_per_page)
+
+
+def farmer_page_count(spec, group_rows):
+    # Pages of a farmer's PDF: the cover page (layouts without a table on
+    # their first page) plus every crop group's table pages
+    cover = 0 if spec.first_page_rows else 1
+    return cover + int(group_page_counts(spec, group_rows).sum())
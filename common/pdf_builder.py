@@ -1,23 +1,145 @@
-from reportlab.platypus import SimpleDocTemplate
+from io import BytesIO
+from pathlib import Path
+from reportlab.platypus import SimpleDocTemplate, Flowable, PageBreak
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
+from common.assets import ArtFormCanvas
+from common.profiling import stage
 
-def generate_pdf(df_transformed, save_path, block, village, fid, farmer, contact,
-                 df_final_filtered, generate_page1, generate_page2):
+
+
+def crop_groups_of(df_transformed, df_final_filtered):
+    # [(crop, transformed rows, sheet rows)] in the order crops first appear.
+    # Batch mode gets them from one groupby over the whole village (see batch.iter_farmers).
+    return [
+        (crop_name, crop_df, df_final_filtered[df_final_filtered["Crop"] == crop_name].copy())
+        for crop_name, crop_df in df_transformed.groupby("फसल का नाम", dropna=False, sort=False, observed=True)
+    ]
+
+
+def build_elements(df_transformed, block, village, fid, farmer, contact,
+                   df_final_filtered, generate_page1, generate_page2, crop_groups=None):
     elements = []
     elements += generate_page1(df_final_filtered, block, village, fid, farmer, contact)
-    elements += generate_page2(df_transformed, block, village, fid, farmer, contact)
+    elements += generate_page2(df_transformed, block, village, fid, farmer, contact, crop_groups=crop_groups)
+    return elements
 
-    doc = SimpleDocTemplate(str(save_path), pagesize=A4, leftMargin=1.5*cm, rightMargin=1.5*cm, topMargin=2*cm, bottomMargin=2*cm)
-    doc.build(elements)
-    
-def generate_pdf2(df_transformed, save_path, block, village, fid, farmer, contact,
-                 df_final_filtered, generate_page1):
+
+def build_elements2(df_transformed, block, village, fid, farmer, contact,
+                    df_final_filtered, generate_page1, crop_groups=None):
     elements = []
-    crop_groups = list(df_transformed.groupby("फसल का नाम", dropna=False, sort=False))
-    for crop_name, crop_df in crop_groups:
-        df_final_filtered_crop = df_final_filtered[df_final_filtered["Crop"] == crop_name].copy()
+    if crop_groups is None:
+        crop_groups = crop_groups_of(df_transformed, df_final_filtered)
+    for crop_name, crop_df, df_final_filtered_crop in crop_groups:
         elements += generate_page1(crop_df, block, village, fid, farmer, contact, df_final_filtered_crop)
+    return elements
+
+
+def _doc_target(target):
+    # SimpleDocTemplate takes a file name or anything with a write() method
+    return target if hasattr(target, "write") else str(target)
+
+
+def build_document(elements, target, margins):
+    doc = SimpleDocTemplate(_doc_target(target), pagesize=A4, **margins)
+    with stage("doc.build"):
+        doc.build(elements)
+
+
+def render_document(elements, margins, stream=None):
+    # Builds the document in memory. Writes it to stream (any writable binary
+    # file object) when given, otherwise returns the PDF as bytes.
+    if stream is not None:
+        build_document(elements, stream, margins)
+        return None
+    buffer = BytesIO()
+    build_document(elements, buffer, margins)
+    return buffer.getvalue()
+
+
+def write_pdf(data, save_path):
+    # Only touches save_path once the whole document rendered
+    with stage("write") as span:
+        span.bytes = len(data)
+        Path(save_path).write_bytes(data)
+
+
+# margins: SimpleDocTemplate margin keywords, from the layout's spec
+# (registry.LayoutSpec.doc_margins)
+def render_pdf(df_transformed, block, village, fid, farmer, contact,
+               df_final_filtered, generate_page1, generate_page2, margins, crop_groups=None, stream=None):
+    elements = build_elements(df_transformed, block, village, fid, farmer, contact,
+                              df_final_filtered, generate_page1, generate_page2, crop_groups)
+    return render_document(elements, margins, stream)
+
+
+def render_pdf2(df_transformed, block, village, fid, farmer, contact,
+                df_final_filtered, generate_page1, margins, crop_groups=None, stream=None):
+    elements = build_elements2(df_transformed, block, village, fid, farmer, contact,
+                               df_final_filtered, generate_page1, crop_groups)
+    return render_document(elements, margins, stream)
+
+
+def generate_pdf(df_transformed, save_path, block, village, fid, farmer, contact,
+                 df_final_filtered, generate_page1, generate_page2, margins, crop_groups=None):
+    write_pdf(render_pdf(df_transformed, block, village, fid, farmer, contact,
+                         df_final_filtered, generate_page1, generate_page2, margins, crop_groups), save_path)
+
+
+def generate_pdf2(df_transformed, save_path, block, village, fid, farmer, contact,
+                 df_final_filtered, generate_page1, margins, crop_groups=None):
+    write_pdf(render_pdf2(df_transformed, block, village, fid, farmer, contact,
+                          df_final_filtered, generate_page1, margins, crop_groups), save_path)
+
+
+class SectionMarker(Flowable):
+    # Zero-size flowable placed at the start of each farmer in a merged
+    # document: adds a bookmark + outline entry and reports the page it
+    # landed on.
+
+    def __init__(self, key, title, on_start=None):
+        super().__init__()
+        self.key = key
+        self.title = title
+        self.on_start = on_start
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        self.canv.bookmarkPage(self.key)
+        self.canv.addOutlineEntry(self.title, self.key, level=0)
+        self.canv.showOutline()
+        if self.on_start is not None:
+            self.on_start(self.key, self.canv.getPageNumber())
+
+
+def generate_merged_pdf(sections, save_path, margins, on_section_start=None):
+    # sections: [(key, outline title, elements)]; save_path may also be a
+    # writable binary stream. All farmers go into one
+    # document, so every image XObject is embedded once and shared by all pages,
+    # and the static art is stamped as form XObjects (see assets.StaticArt).
+    # Returns {key: (first page, last page)}.
+    starts = {}
+
+    def record_start(key, page):
+        starts[key] = page
+        if on_section_start is not None:
+            on_section_start(key, page)
+
+    story = []
+    for i, (key, title, elements) in enumerate(sections):
+        if i > 0:
+            story.append(PageBreak())
+        story.append(SectionMarker(key, title, record_start))
+        story += elements
+
+    doc = SimpleDocTemplate(_doc_target(save_path), pagesize=A4, **margins)
+    with stage("doc.build", merged=True):
+        doc.build(story, canvasmaker=ArtFormCanvas)
 
-    doc = SimpleDocTemplate(str(save_path), pagesize=A4, leftMargin=1.5*cm, rightMargin=1.5*cm, topMargin=1*cm, bottomMargin=1*cm)
-    doc.build(elements)    
+    keys = [key for key, _, _ in sections]
+    page_ranges = {}
+    for i, key in enumerate(keys):
+        next_start = starts[keys[i + 1]] if i + 1 < len(keys) else doc.page + 1
+        page_ranges[key] = (starts[key], next_start - 1)
+    return page_ranges
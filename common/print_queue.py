@@ -0,0 +1,227 @@
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from common.batch import run_jobs, run_merged
+from common.profiling import stage
+
+# A backend is any callable taking the path of a finished PDF that returns
+# once the printing system has accepted the job (the file may be deleted
+# afterwards) and raises if it was refused. A backend whose printing system
+# reads the file later sets a settle_seconds attribute: PrintQueue then keeps
+# each file that long after handing it over before deleting it.
+
+
+def shell_execute_backend(settle_seconds=5):
+    # Windows: hand the file to the registered PDF viewer's "print" verb. The
+    # viewer reads the file after ShellExecute returns and there is no signal
+    # for when it is done, so the file must outlive the call for a while. The
+    # backend doesn't wait for that itself (which capped printing at a couple
+    # of files per settle_seconds); the queue keeps the file instead.
+    def backend(path):
+        import win32api
+        win32api.ShellExecute(0, "print", str(path), None, ".", 0)
+    backend.settle_seconds = settle_seconds
+    return backend
+
+
+def lpr_backend(printer=None):
+    # CUPS / BSD spooler: lp and lpr copy the file into the spool before
+    # returning, so a zero exit status means the job was accepted.
+    def backend(path):
+        if shutil.which("lp"):
+            command = ["lp"] + (["-d", printer] if printer else []) + [str(path)]
+        else:
+            command = ["lpr"] + (["-P", printer] if printer else []) + [str(path)]
+        done = subprocess.run(command, capture_output=True, text=True)
+        if done.returncode != 0:
+            raise RuntimeError(done.stderr.strip() or f"{command[0]} exited with {done.returncode}")
+    return backend
+
+
+def directory_backend(target_dir):
+    # Stand-in printer: "prints" by copying into a folder. For trying the
+    # queue on machines without a printer.
+    target_dir = Path(target_dir)
+
+    def backend(path):
+        target_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(path, target_dir / Path(path).name)
+    return backend
+
+
+def default_backend():
+    # None when this machine has no way to print
+    if platform.system() == "Windows":
+        return shell_execute_backend()
+    if shutil.which("lp") or shutil.which("lpr"):
+        return lpr_backend()
+    return None
+
+
+def backend_from_spec(spec):
+    # "default", "shell", "lpr", "lpr:PRINTER" or "dir:PATH" (command-line form)
+    name, _, arg = spec.partition(":")
+    if name == "default":
+        backend = default_backend()
+        if backend is None:
+            raise ValueError("No printing system found on this machine")
+        return backend
+    if name == "shell":
+        return shell_execute_backend()
+    if name == "lpr":
+        return lpr_backend(arg or None)
+    if name == "dir" and arg:
+        return directory_backend(arg)
+    raise ValueError(f"Unknown print backend '{spec}'. Use default, shell, lpr[:PRINTER] or dir:PATH")
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class PrintQueue:
+    # Sends PDFs to a backend from background threads. At most max_in_flight
+    # jobs are being submitted at once; submit() blocks once max_pending
+    # files are waiting, so rendering can run ahead of the printer but not
+    # fill the temp folder. Files are deleted once their job is accepted
+    # (cleanup=True), or settle_seconds later for backends that set it;
+    # refused ones are kept so they can be printed by hand.
+
+    def __init__(self, backend, max_in_flight=2, max_pending=16, cleanup=True):
+        self.backend = backend
+        self.cleanup = cleanup
+        self.settle_seconds = getattr(backend, "settle_seconds", 0)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="print")
+        self._futures = []
+        self._settling = deque()  # (delete after, path), oldest first
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _print(self, path):
+        try:
+            with stage("print", file=Path(path).name):
+                self.backend(path)
+            if self.cleanup:
+                if self.settle_seconds:
+                    with self._lock:
+                        self._settling.append((time.monotonic() + self.settle_seconds, path))
+                    self._remove_settled()
+                else:
+                    _remove(path)
+        finally:
+            self._slots.release()
+
+    def _remove_settled(self, wait=False):
+        # Deletes the handed-over files whose settle time has passed; with
+        # wait=True sleeps until all of them have (once, at the end of a batch)
+        while True:
+            with self._lock:
+                if not self._settling:
+                    return
+                due, path = self._settling[0]
+                delay = due - time.monotonic()
+                if delay <= 0:
+                    self._settling.popleft()
+            if delay > 0:
+                if not wait:
+                    return
+                time.sleep(delay)
+                continue
+            _remove(path)
+
+    def submit(self, path):
+        # Returns a Future that resolves once the job is accepted
+        self._slots.acquire()
+        future = self._pool.submit(self._print, path)
+        self._futures.append((path, future))
+        return future
+
+    def close(self, cancel=False):
+        # Waits for submitted jobs; with cancel=True jobs not yet handed to
+        # the backend are dropped and their files deleted
+        if self._closed:
+            return
+        self._closed = True
+        if cancel:
+            for path, future in self._futures:
+                if future.cancel():
+                    self._slots.release()
+                    if self.cleanup:
+                        Path(path).unlink(missing_ok=True)
+        self._pool.shutdown(wait=True)
+        self._remove_settled(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close(cancel=exc[0] is not None)
+
+
+def print_jobs(jobs, backend, workers=1, on_result=None, should_stop=None, runner=run_jobs,
+               max_in_flight=2):
+    # Same call shape as run_jobs: renders the jobs and queues every PDF for
+    # printing as soon as it is written, so the printer works through the
+    # first farmers while later ones are still rendering. Returns once the
+    # queue has drained; print failures are reported on the farmer's result.
+    queued = []
+    with PrintQueue(backend, max_in_flight=max_in_flight) as queue:
+        def rendered(result):
+            if not result.error:
+                queued.append((result, queue.submit(result.save_path)))
+            if on_result is not None:
+                on_result(result)
+
+        results = runner(jobs, workers=workers, on_result=rendered, should_stop=should_stop)
+        queue.close(cancel=should_stop is not None and should_stop())
+
+    for result, future in queued:
+        if future.cancelled():
+            result.error = "Not printed (cancelled)"
+        elif future.exception() is not None:
+            result.error = f"Print failed: {future.exception()}"
+    return results
+
+
+def page_log_path(save_path):
+    return Path(save_path).with_suffix(".pages.txt")
+
+
+def write_page_log(results, save_path):
+    # One line per farmer in the merged print file: "first-last<TAB>fid<TAB>name",
+    # so a section that came out wrong can be reprinted by page range
+    lines = [f"{r.pages[0]}-{r.pages[1]}\t{r.fid}\t{r.farmer}" for r in results if r.pages]
+    path = page_log_path(save_path)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def print_merged(jobs, backend, save_path, workers=1, on_result=None, should_stop=None, runner=run_merged):
+    # Same call shape as run_jobs: builds a village's farmers into the single
+    # document save_path and sends it to the printer as one job, instead of
+    # paying the spooler's and viewer's per-job startup for every farmer. The
+    # page range of each farmer is written next to it (page_log_path) and
+    # kept after the PDF itself is cleaned up.
+    results = runner(jobs, save_path=save_path, workers=workers, on_result=on_result, should_stop=should_stop)
+    merged = [r for r in results if not r.error and r.pages]
+    if not merged or (should_stop is not None and should_stop()):
+        Path(save_path).unlink(missing_ok=True)
+        return results
+
+    write_page_log(merged, save_path)
+    with PrintQueue(backend, max_in_flight=1) as queue:
+        future = queue.submit(save_path)
+    if future.exception() is not None:
+        for result in merged:
+            result.error = f"Print failed: {future.exception()}"
+    return results
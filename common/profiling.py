@@ -0,0 +1,221 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from functools import wraps
+
+# Opt-in timing of the generation pipeline. Off by default: stage() then
+# hands back one shared do-nothing context and @profiled functions cost a
+# single flag check, so the hooks can stay in the hot paths.
+#
+#   profiling.enable()
+#   ...generate PDFs...
+#   print(profiling.format_summary())
+#   profiling.export_chrome_trace("trace.json")   # chrome://tracing or ui.perfetto.dev
+#
+# Setting SMART_PDF_PROFILE=trace.json does the same for a whole run of the
+# app (see enable_from_env).
+
+ENV_VAR = "SMART_PDF_PROFILE"
+
+_enabled = False
+_events = []  # dicts: name, ts, dur (seconds), pid, tid, farmer, bytes, args
+_local = threading.local()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def init_worker(enabled):
+    # Pool initializer: carries the switch into a worker process and drops
+    # any events a forked worker inherited from its parent
+    global _enabled
+    _enabled = enabled
+    _events.clear()
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    _events.clear()
+
+
+def events():
+    return list(_events)
+
+
+def drain():
+    # Events recorded so far, removed from this process (sent back from pool workers)
+    taken = _events[:]
+    del _events[:len(taken)]
+    return taken
+
+
+def merge(recorded):
+    # Adds events recorded in another process
+    if recorded:
+        _events.extend(recorded)
+
+
+class _Span:
+    __slots__ = ("name", "args", "bytes", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.bytes = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        _events.append({
+            "name": self.name,
+            "ts": self.start,
+            "dur": end - self.start,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "farmer": getattr(_local, "farmer", None),
+            "bytes": self.bytes,
+            "args": self.args,
+        })
+        return False
+
+
+class _NullSpan:
+    # Shared stand-in while profiling is off; anything assigned is dropped
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def stage(name, **args):
+    # with stage("write") as span: ...; span.bytes = len(data)
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def profiled(name):
+    # Decorator: times every call of the function as stage `name`
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class farmer:
+    # Tags every stage recorded on this thread inside the block with a farmer label
+    def __init__(self, label):
+        self.label = label
+
+    def __enter__(self):
+        self.previous = getattr(_local, "farmer", None)
+        _local.farmer = self.label
+        return self
+
+    def __exit__(self, *exc):
+        _local.farmer = self.previous
+        return False
+
+
+def summary(recorded=None):
+    # {stage: {"count", "seconds", "mean", "max", "bytes", "farmers"}}, slowest total first.
+    # Nested stages are counted in full, so totals of outer stages include inner ones.
+    stages = {}
+    for event in (_events if recorded is None else recorded):
+        entry = stages.setdefault(event["name"], {"count": 0, "seconds": 0.0, "max": 0.0, "bytes": 0,
+                                                  "farmers": set()})
+        entry["count"] += 1
+        entry["seconds"] += event["dur"]
+        entry["max"] = max(entry["max"], event["dur"])
+        entry["bytes"] += event["bytes"]
+        if event["farmer"] is not None:
+            entry["farmers"].add(event["farmer"])
+    for entry in stages.values():
+        entry["mean"] = entry["seconds"] / entry["count"]
+        entry["farmers"] = len(entry["farmers"])
+    return dict(sorted(stages.items(), key=lambda item: -item[1]["seconds"]))
+
+
+def per_farmer(recorded=None):
+    # {farmer: {stage: seconds}}
+    farmers = {}
+    for event in (_events if recorded is None else recorded):
+        if event["farmer"] is not None:
+            stages = farmers.setdefault(event["farmer"], {})
+            stages[event["name"]] = stages.get(event["name"], 0.0) + event["dur"]
+    return farmers
+
+
+def format_summary(recorded=None):
+    lines = [f"{'stage':28} {'calls':>7} {'total s':>9} {'mean ms':>9} {'max ms':>9} {'KB':>9} {'farmers':>8}"]
+    for name, entry in summary(recorded).items():
+        lines.append(
+            f"{name:28} {entry['count']:7d} {entry['seconds']:9.3f} {1e3 * entry['mean']:9.2f} "
+            f"{1e3 * entry['max']:9.2f} {entry['bytes'] / 1024:9.0f} {entry['farmers']:8d}"
+        )
+    return "\n".join(lines)
+
+
+def export_chrome_trace(path, recorded=None):
+    # Chrome trace-event format: complete ("X") events in microseconds
+    recorded = _events if recorded is None else recorded
+    origin = min((event["ts"] for event in recorded), default=0.0)
+    trace = []
+    for event in recorded:
+        args = dict(event["args"])
+        if event["farmer"] is not None:
+            args["farmer"] = event["farmer"]
+        if event["bytes"]:
+            args["bytes"] = event["bytes"]
+        trace.append({
+            "name": event["name"], "ph": "X", "cat": "smart-pdf",
+            "ts": round((event["ts"] - origin) * 1e6, 1), "dur": round(event["dur"] * 1e6, 1),
+            "pid": event["pid"], "tid": event["tid"], "args": args,
+        })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f, default=str)
+
+
+def enable_from_env():
+    # SMART_PDF_PROFILE=<trace.json>: profile this run, then print the summary
+    # and write the trace when the process exits
+    path = os.environ.get(ENV_VAR)
+    if not path:
+        return False
+    enable()
+
+    def report():
+        if _events:
+            print(format_summary(), file=sys.stderr)
+            export_chrome_trace(path)
+            print(f"Profile trace written to {path}", file=sys.stderr)
+    atexit.register(report)
+    return True
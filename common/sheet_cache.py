@@ -0,0 +1,93 @@
+import hashlib
+import os
+import platform
+from pathlib import Path
+import pandas as pd
+from common.excel_loader import load_sheet
+from common.profiling import profiled
+
+# Bump when load_sheet's output changes so stale caches are ignored
+CACHE_VERSION = 2
+
+
+def default_cache_dir():
+    if platform.system() == "Windows":
+        base = Path(os.environ.get("LOCALAPPDATA", Path.home() / "AppData" / "Local"))
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    return base / "smart-pdf-generator" / "sheets"
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _cache_stem(file_path):
+    # <source path hash>-<size/mtime hash>: the first part finds older
+    # versions of the same workbook, the second invalidates on any change.
+    source = Path(file_path).resolve()
+    stat = source.stat()
+    path_key = hashlib.sha1(str(source).encode("utf-8")).hexdigest()[:16]
+    state_key = hashlib.sha1(
+        f"{stat.st_size}|{stat.st_mtime_ns}|{CACHE_VERSION}".encode("utf-8")
+    ).hexdigest()[:16]
+    return path_key, f"{path_key}-{state_key}"
+
+
+def _read_cached(cache_dir, stem):
+    # Feather when pyarrow is installed and the frame was storable as columns,
+    # pickle otherwise (mixed-type object columns that Arrow can't hold).
+    feather = cache_dir / f"{stem}.feather"
+    if feather.exists() and _has_pyarrow():
+        return pd.read_feather(feather)
+    pickle = cache_dir / f"{stem}.pkl"
+    if pickle.exists():
+        return pd.read_pickle(pickle)
+    return None
+
+
+def _write_cached(cache_dir, path_key, stem, df):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for old in cache_dir.glob(f"{path_key}-*"):
+        old.unlink(missing_ok=True)
+
+    if _has_pyarrow():
+        target = cache_dir / f"{stem}.feather"
+        tmp = target.with_suffix(".tmp")
+        try:
+            df.to_feather(tmp)
+            os.replace(tmp, target)
+            return
+        except Exception:
+            tmp.unlink(missing_ok=True)
+
+    target = cache_dir / f"{stem}.pkl"
+    tmp = target.with_suffix(".tmp")
+    df.to_pickle(tmp)
+    os.replace(tmp, target)
+
+
+@profiled("load_sheet_cached")
+def load_sheet_cached(file_path, cache_dir=None):
+    # load_sheet() backed by an on-disk copy of the parsed, FID-normalized
+    # sheet, keyed by path, size and mtime. Returns (df, loaded_from_cache).
+    cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    path_key, stem = _cache_stem(file_path)
+
+    try:
+        df = _read_cached(cache_dir, stem)
+    except Exception:
+        df = None  # unreadable cache entry: reparse and overwrite it
+    if df is not None:
+        return df, True
+
+    df = load_sheet(file_path)
+    try:
+        _write_cached(cache_dir, path_key, stem, df)
+    except OSError:
+        pass  # a read-only or full cache dir should never block loading
+    return df, False
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+from common.profiling import profiled
+
+INDEX_COLUMNS = ["Block", "Village", "FID", "Farmer Name"]
+
+
+class SheetIndex:
+    # Block -> Village -> FID -> Farmer Name -> row positions, built with a
+    # single groupby when a sheet is loaded. Dropdowns read the pre-sorted key
+    # lists and batch mode slices rows with df.iloc[positions] instead of
+    # rescanning the whole sheet with boolean masks.
+
+    def __init__(self, df):
+        # Categorical columns (see excel_loader.apply_column_types) group by code
+        keys = [
+            df[col] if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].astype(str)
+            for col in INDEX_COLUMNS
+        ]
+        groups = df.groupby(keys, sort=False, observed=True).indices
+
+        self._tree = {}
+        for (block, village, fid, farmer), positions in groups.items():
+            (self._tree.setdefault(block, {})
+                       .setdefault(village, {})
+                       .setdefault(fid, {}))[farmer] = positions
+
+        # Pre-sorted option lists so every dropdown update is a dict lookup
+        self._blocks = sorted(self._tree)
+        self._villages = {b: sorted(vs) for b, vs in self._tree.items()}
+        self._fids = {(b, v): sorted(fs) for b, vs in self._tree.items() for v, fs in vs.items()}
+        self._farmers = {
+            (b, v, f): sorted(names)
+            for b, vs in self._tree.items() for v, fs in vs.items() for f, names in fs.items()
+        }
+
+    def blocks(self):
+        return self._blocks
+
+    def villages(self, block):
+        return self._villages.get(block, [])
+
+    def fids(self, block, village):
+        return self._fids.get((block, village), [])
+
+    def farmers(self, block, village, fid):
+        return self._farmers.get((block, village, fid), [])
+
+    def farmer_groups(self, block, village, fid=None):
+        # [(fid, farmer name, positions)] in sheet order, like drop_duplicates() gave
+        groups = [
+            (cur_fid, name, positions)
+            for cur_fid, names in self._tree.get(block, {}).get(village, {}).items()
+            if fid is None or cur_fid == fid
+            for name, positions in names.items()
+        ]
+        groups.sort(key=lambda g: g[2][0])
+        return groups
+
+    @profiled("filter")
+    def rows(self, block, village=None, fid=None, farmer=None):
+        # Sheet positions for any prefix of Block / Village / FID / Farmer Name
+        node = self._tree.get(block, {})
+        for key in (village, fid, farmer):
+            if key is None:
+                break
+            node = node.get(key, {})
+
+        if isinstance(node, np.ndarray):
+            return node
+        parts = list(_leaves(node))
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(parts))
+
+
+def _leaves(node):
+    for child in node.values():
+        if isinstance(child, np.ndarray):
+            yield child
+        else:
+            yield from _leaves(child)
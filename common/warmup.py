@@ -0,0 +1,54 @@
+import threading
+import time
+from importlib import import_module
+
+# Heavy modules the first Load / Save / Print needs. main.py imports them on
+# a background thread once the window is up, so the first click doesn't pay
+# for them; anything the user reaches before that simply waits on Python's
+# import lock for the warm-up to finish that module.
+WARM_UP_MODULES = (
+    "numpy",
+    "pandas",
+    "openpyxl",
+    "PIL.Image",
+    "reportlab.platypus",
+    "common.sheet_cache",
+    "common.sheet_index",
+    "common.batch",
+)
+
+
+def warm_up(layout_names=(), timings=None):
+    # Imports WARM_UP_MODULES, then each layout and its shared static parts
+    # (styles, fonts, header artwork). Appends (what, seconds) to timings;
+    # a module shows only the part of its cost not already paid by earlier ones.
+    timings = [] if timings is None else timings
+    for name in WARM_UP_MODULES:
+        start = time.perf_counter()
+        import_module(name)
+        timings.append((name, time.perf_counter() - start))
+
+    from common.batch import load_layout
+    for layout_name in layout_names:
+        start = time.perf_counter()
+        try:
+            layout, _ = load_layout(layout_name)
+            layout.static_parts()
+        except Exception:
+            pass  # missing artwork etc. surfaces when the user actually renders
+        timings.append((f"{layout_name} (layout + artwork)", time.perf_counter() - start))
+    return timings
+
+
+def start_warm_up(layout_names=()):
+    # Runs warm_up on a daemon thread; returns (thread, timings being filled in)
+    timings = []
+    thread = threading.Thread(target=warm_up, args=(layout_names, timings), name="warm-up", daemon=True)
+    thread.start()
+    return thread, timings
+
+
+def format_timings(timings):
+    lines = [f"  {name:36} {1e3 * seconds:8.1f} ms" for name, seconds in timings]
+    lines.append(f"  {'total':36} {1e3 * sum(seconds for _, seconds in timings):8.1f} ms")
+    return "\n".join(lines)
@@ -3,17 +3,28 @@ import os
 import pandas as pd
 from PIL import Image as PILimage
 from PIL import ImageDraw, ImageFont
-import io
+from copy import copy
+from functools import lru_cache, partial
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import Table, TableStyle, Paragraph, PageBreak, Spacer
 from reportlab.lib import colors
 from reportlab.lib.units import cm
 from reportlab.lib.styles import ParagraphStyle
-from common.pdf_builder import generate_pdf2
-from math import ceil
+from common.pdf_builder import generate_pdf2, render_pdf2, build_elements2
 from reportlab.lib import colors
 from pathlib import Path
-from reportlab.platypus import Image
+from reportlab.platypus import Image, Flowable
+from reportlab.lib.utils import ImageReader
+from common.assets import cached_image
+from common.fixed_grid import FixedGrid
+from common.data_transform import cell_text, display_frame
+from common.pagination import group_pages, table_rows
+from common.profiling import profiled
+from layouts.registry import get as get_spec
+
+# Version, column map, page geometry and artwork (file and draw size) are declared in layouts/registry.py
+SPEC = get_spec("Layout2")
+DOC_MARGINS = SPEC.doc_margins()
 
 # Helper to get the path of the bundled font folder
 def resource_path(relative_path):
@@ -24,33 +35,35 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
-def save_image_with_texts(
-    image_path, 
-    text1, 
-    text2, 
-    font_path,
-    out_w,
-    out_h, 
-    font_size=28,   # smaller font
-    margin=25, 
-    offset_down=30, # push both lines down more
-    spacing=15      # more vertical space between lines
-):
-    # Open image
-    img = PILimage.open(image_path).convert("RGBA")
-    width, height = img.size
 
-    # Draw on it
-    draw = ImageDraw.Draw(img)
-    font = ImageFont.truetype(font_path, font_size)
+def asset(name):
+    # One of SPEC.assets, drawn at its declared size (shared via common/assets.py)
+    path, width, height = SPEC.asset(name)
+    return cached_image(resource_path(path), width=width, height=height)
+
+@lru_cache(maxsize=None)
+def _load_base_image(image_path):
+    # Decoded once per process; callers draw on a copy
+    return PILimage.open(image_path).convert("RGBA")
+
+
+@lru_cache(maxsize=None)
+def _load_font(font_path, font_size):
+    return ImageFont.truetype(font_path, font_size)
+
+
+def _text_positions(image_path, text1, text2, font_path, font_size, margin, offset_down, spacing):
+    # Pixel positions of both (right-aligned) lines on the base image
+    width, height = _load_base_image(image_path).size
+    font = _load_font(font_path, font_size)
 
     # Measure first text
-    bbox1 = draw.textbbox((0, 0), text1, font=font)
+    bbox1 = font.getbbox(text1)
     text1_width = bbox1[2] - bbox1[0]
     text1_height = bbox1[3] - bbox1[1]
 
     # Measure second text
-    bbox2 = draw.textbbox((0, 0), text2, font=font)
+    bbox2 = font.getbbox(text2)
     text2_width = bbox2[2] - bbox2[0]
     text2_height = bbox2[3] - bbox2[1]
 
@@ -61,120 +74,261 @@ def save_image_with_texts(
     # Position second text
     y2 = y1 + text1_height + spacing
     x2 = width - text2_width - margin
+    return (x1, y1), (x2, y2)
+
+
+class ImageWithTexts(Flowable):
+    # Static signature image with the two text lines drawn as PDF text on top,
+    # so nothing is rasterized per farmer and the image itself is shared.
+
+    def __init__(self, image_path, text1, text2, font_path, out_w, out_h,
+                 font_size, margin, offset_down, spacing):
+        super().__init__()
+        self.image = cached_image(image_path, width=out_w, height=out_h)
+        self.texts = (text1, text2)
+        self.width, self.height = out_w, out_h
+
+        img_w, img_h = _load_base_image(image_path).size
+        self.scale_x = out_w / img_w
+        self.scale_y = out_h / img_h
+        self.font_size = font_size * self.scale_y
+        self.right = (img_w - margin) * self.scale_x
+        ascent = _load_font(font_path, font_size).getmetrics()[0]
+        positions = _text_positions(image_path, text1, text2, font_path, font_size, margin, offset_down, spacing)
+        # PIL anchors text at the ascender; PDF draws on the baseline from the bottom edge
+        self.baselines = [out_h - (y + ascent) * self.scale_y for _, y in positions]
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.image.drawOn(self.canv, 0, 0)
+        self.canv.setFont("Helvetica", self.font_size)
+        self.canv.setFillColor(colors.black)
+        for text, baseline in zip(self.texts, self.baselines):
+            self.canv.drawRightString(self.right, baseline, text)
+
+
+@lru_cache(maxsize=256)
+def _image_with_texts(image_path, text1, text2, font_path, out_w, out_h, font_size, margin, offset_down, spacing):
+    # Memoized per (farmer, contact, size): every crop page of a farmer reuses one flowable
+    img = _load_base_image(image_path).copy()
+
+    # Draw on it
+    draw = ImageDraw.Draw(img)
+    font = _load_font(font_path, font_size)
+    (x1, y1), (x2, y2) = _text_positions(image_path, text1, text2, font_path, font_size, margin, offset_down, spacing)
 
     # Draw both in black
     draw.text((x1, y1), text1, font=font, fill=(0, 0, 0, 255))
     draw.text((x2, y2), text2, font=font, fill=(0, 0, 0, 255))
 
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-    return Image(buf, width=out_w, height=out_h)
+    image = Image(image_path, width=out_w, height=out_h)
+    image._img = ImageReader(img)
+    return image
 
 
-def generate_page2(leftover_df, header_row, data_tbl_width, tbl_style, table_sign, total_value, fid, englishnormal):
-    
+@profiled("layout2.sign_image")
+def save_image_with_texts(
+    image_path, 
+    text1, 
+    text2, 
+    font_path,
+    out_w,
+    out_h, 
+    font_size=28,   # smaller font
+    margin=25, 
+    offset_down=30, # push both lines down more
+    spacing=15,     # more vertical space between lines
+    vector_text=False
+):
+    if vector_text:
+        return ImageWithTexts(image_path, text1, text2, font_path, out_w, out_h,
+                              font_size, margin, offset_down, spacing)
+    return _image_with_texts(image_path, text1, text2, font_path, out_w, out_h,
+                             font_size, margin, offset_down, spacing)
+
+
+DATA_TBL_WIDTH = SPEC.col_widths()
+
+
+class StaticParts:
+    # The parts of a layout2 document that are identical for every farmer,
+    # built once per process by static_parts(). Styles, TableStyles and the
+    # image rows are only read by ReportLab, so they are shared; the table
+    # under the data grid is a flowable, so each page gets a copy.
+
+    def __init__(self):
+        self.englishnormal = ParagraphStyle(
+            name="eng",
+            fontName="Helvetica",
+            fontSize=9,
+            alignment=0,
+        )
+        self.left_style = ParagraphStyle("Left", fontName="Helvetica", fontSize=9, alignment=0)
+
+        self.page1_style = TableStyle([
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+
+            # Merge mini-table area (columns 2-5 in row 8)
+            ("SPAN", (2, 7), (5, 7)),
+
+            # Merge notes area (columns 2–5 in row 9)
+            ("SPAN", (2, 8), (5, 8)),
+
+            # Remove padding from the mini-table container cell
+            ("LEFTPADDING", (2, 7), (5, 7), 0),
+            ("RIGHTPADDING", (2, 7), (5, 7), 0),
+            ("TOPPADDING", (2, 7), (5, 7), 0),
+            ("BOTTOMPADDING", (2, 7), (5, 7), 0),
+        ])
+
+        self.table_header = (
+            asset("l2_table1"),
+            asset("l2_table2"),
+            asset("l2_table3"),
+            asset("l2_table4"),
+            asset("l2_table5"),
+            asset("l2_table6"),
+            asset("l2_table7"),
+            asset("l2_table8")
+        )
+        self.total_label = asset("l2_sum")
+        self.table_style = TableStyle([
+            ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+            ("FONTSIZE", (0, 0), (-1, -1), 8),
+            ("LEADING",  (0, 1), (-1, -1), 9),
+            ("GRID", (0, 0), (-1, -2), 0.5, colors.black),  # all grid except total row bottom
+            ("GRID", (0, -1), (-1, -1), 0.5, colors.black), # grid for total row too
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+
+            # TOTAL ROW MERGES:
+            # Merge first four cells of the total row (0..3) to make whitespace block on left
+            ("SPAN", (0, -1), (2, -1)),
+            ("SPAN", (3, -1), (7, -1)),
+            ("SPAN", (7, 1), (7, -2)),
+            # --- TOTAL ROW ALIGNMENTS ---
+            ("ALIGN", (0, -1), (0, -1), "RIGHT"),  # label right
+            ("ALIGN", (3, -1), (3, -1), "LEFT"),   # value left
+
+            # --- TOTAL ROW HEIGHT (smaller) ---
+            ("TOPPADDING", (0, -1), (-1, -1), 0),
+            ("BOTTOMPADDING", (0, -1), (-1, -1), 0),
+        ])
+
+        blow_tbl_img = asset("l2_p1_below_table")
+        self.below_table = Table([[blow_tbl_img]], colWidths=[19.88*cm])  # colWidths same as the image width
+        self.below_table.setStyle(TableStyle([
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("LEFTPADDING", (0, 0), (-1, -1), 0),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+            ("TOPPADDING", (0, 0), (-1, -1), 0),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+        ]))
+
+        # Signature boxes 2-4 (box 1 carries the farmer's name and contact)
+        self.sign_images = (
+            asset("l2_sign2"),
+            asset("l2_sign3"),
+            asset("l2_sign4")
+        )
+
+    def new_below_table(self):
+        return copy(self.below_table)
+
+
+@lru_cache(maxsize=None)
+def static_parts():
+    return StaticParts()
+
+
+@profiled("layout2.generate_page2")
+def generate_page2(pages, values, header_row, data_tbl_width, tbl_style, table_sign, total_value, fid, englishnormal,
+                   fast_grid=False):
+    # pages: the crop's overflow pages (see common/pagination.py), 40 rows
+    # each numbered on from the first page (11..50, 51..90, ...)
     elements = [] 
-    
-    # --- constants ---
-    DATA_PER_PAGE = 40
-    START_NUM = 11
-
-    # Make a display-safe copy (no NaN strings)
-    df = leftover_df.reset_index(drop=True).copy()
-
-    total_pages = ceil(len(df) / DATA_PER_PAGE) or 1
-
-    for page_index in range(total_pages):
-        start = page_index * DATA_PER_PAGE
-        end   = start + DATA_PER_PAGE
-        chunk = df.iloc[start:end].copy()
-
-        # Build exactly 50 visible rows (numbers 11..50), first fill with data, then blanks
-        numbered_rows = []
-        for i in range(DATA_PER_PAGE):
-            row_num = START_NUM + i
-            if i < len(chunk):
-                row_vals = chunk.iloc[i].tolist()
-                # ensure correct width and set serial number in col 0
-                if len(row_vals) >= 1:
-                    row_vals[0] = str(row_num)
-                else:
-                    row_vals = [str(row_num)] + [""] * 7
-            else:
-                row_vals = [str(row_num)] + [""] * 7
-            numbered_rows.append(row_vals)
-        START_NUM += 40
+
+    for page in pages:
+        numbered_rows = table_rows(page, values, len(header_row))
         # Assemble table: header + numbered rows
         table_data = [header_row] + numbered_rows
 
-        # Build a row with the same number of columns as the main table (+1 for the serial column)
-        total_row = [""] * 8
-
-        total_label = Image(resource_path("images/l2_sum.PNG"), width=3*cm, height=15)
-        total_row[0] = total_label
-        total_row[3] = total_value
-        table_data.append(total_row)
-        
-        tbl = Table(table_data, colWidths=data_tbl_width)
-        
-        tbl.setStyle(tbl_style)
+        total_label = static_parts().total_label
+        if fast_grid:
+            # Same page drawn straight onto the canvas (see FixedGrid): font size 8,
+            # leading 9, the last column merged over the body and the total row
+            # spans of tbl_style.
+            tbl = FixedGrid(header_row, numbered_rows, data_tbl_width, font_size=8, leading=9,
+                            merged_column=7,
+                            footer=[(0, 2, total_label, "RIGHT"), (3, 7, total_value, "LEFT")])
+        else:
+            # Build a row with the same number of columns as the main table (+1 for the serial column)
+            total_row = [""] * 8
+
+            total_row[0] = total_label
+            total_row[3] = total_value
+            table_data.append(total_row)
+
+            tbl = Table(table_data, colWidths=data_tbl_width)
+
+            tbl.setStyle(tbl_style)
         elements.append(Paragraph(f"<b>{fid}</b>", englishnormal))
         elements.append(Spacer(1, 3))
         elements.append(tbl)
         elements.append(Spacer(1, 10))   
         elements.append(table_sign)
-        elements.append(Image(resource_path("images/l2_bottom.PNG"), width=20*cm, height=40))
+        elements.append(asset("l2_bottom"))
         # Page break between pages (not after the last page)
-        if page_index < total_pages - 1:
+        if not page.closes_group:
             elements.append(PageBreak())
 
     return elements
 
-def generate_page1(df_transformed, block, village, fid, farmer, contact, df_final_filtered):
+@profiled("layout2.generate_page1")
+def generate_page1(df_transformed, block, village, fid, farmer, contact, df_final_filtered, vector_sign_text=False,
+                   fast_grid=False):
     elements = []
-    
-    englishnormal = ParagraphStyle(
-        name="eng",
-        fontName="Helvetica",
-        fontSize=9,
-        alignment=0,
-    )
+    parts = static_parts()
+    englishnormal = parts.englishnormal
     elements.append(Paragraph(f"<b>{fid}</b>", englishnormal))
-    elements.append(Image(resource_path("images/l2_title.PNG"), width=20*cm, height=45))
+    elements.append(asset("l2_title"))
     elements.append(Spacer(1, 10))
 
 
     # fetch values from the DataFrame
-    survey_number = df_final_filtered["Survey Number"].astype(str).iloc[0] if not df_final_filtered.empty else ""
-    event_date = df_final_filtered["Event occurred Date"].astype(str).iloc[0] if not df_final_filtered.empty else ""
-    intimation_date = df_final_filtered["Date of Intimation"].astype(str).iloc[0] if not df_final_filtered.empty else ""
-    crop = df_final_filtered["Crop"].astype(str).iloc[0] if not df_final_filtered.empty else ""
-    Intimation_Application_id = df_final_filtered["Intimation_Application id"].astype(str).iloc[0][:19] if not df_final_filtered.empty else ""
+    survey_number = cell_text(df_final_filtered["Survey Number"].iloc[0]) if not df_final_filtered.empty else ""
+    event_date = cell_text(df_final_filtered["Event occurred Date"].iloc[0]) if not df_final_filtered.empty else ""
+    intimation_date = cell_text(df_final_filtered["Date of Intimation"].iloc[0]) if not df_final_filtered.empty else ""
+    crop = cell_text(df_final_filtered["Crop"].iloc[0]) if not df_final_filtered.empty else ""
+    Intimation_Application_id = cell_text(df_final_filtered["Intimation_Application id"].iloc[0])[:19] if not df_final_filtered.empty else ""
     
     data = [
-        ["1.", Image(resource_path("images/l2_1.PNG"), width=100, height=13), Paragraph(farmer, englishnormal), 
-        "2.", Image(resource_path("images/l2_2.PNG"), width=100, height=13), ""],
+        ["1.", asset("l2_1"), Paragraph(farmer, englishnormal), 
+        "2.", asset("l2_2"), ""],
 
-        ["3.", Image(resource_path("images/l2_3.PNG"), width=100, height=17), Paragraph(village, englishnormal), 
-        "4.", Image(resource_path("images/l2_4.PNG"), width=100, height=17), Paragraph(block, englishnormal)],
+        ["3.", asset("l2_3"), Paragraph(village, englishnormal), 
+        "4.", asset("l2_4"), Paragraph(block, englishnormal)],
 
-        ["5.", Image(resource_path("images/l2_5.PNG"), width=100, height=15), Paragraph("Hisar", englishnormal), 
-        "6.", Image(resource_path("images/l2_6.PNG"), width=100, height=15), Paragraph("HDFC Ergo", englishnormal)],
+        ["5.", asset("l2_5"), Paragraph("Hisar", englishnormal), 
+        "6.", asset("l2_6"), Paragraph("HDFC Ergo", englishnormal)],
 
-        ["7.", Image(resource_path("images/l2_7.PNG"), width=100, height=22), Paragraph(crop, englishnormal), 
-        "8.", Image(resource_path("images/l2_8.PNG"), width=100, height=23), Paragraph(survey_number, englishnormal)],
+        ["7.", asset("l2_7"), Paragraph(crop, englishnormal), 
+        "8.", asset("l2_8"), Paragraph(survey_number, englishnormal)],
 
-        ["9.", Image(resource_path("images/l2_9.PNG"), width=100, height=18), "", 
-        "10.", Image(resource_path("images/l2_10.PNG"), width=100, height=15), ""],
+        ["9.", asset("l2_9"), "", 
+        "10.", asset("l2_10"), ""],
 
-        ["11.", Image(resource_path("images/l2_11.PNG"), width=100, height=18), "", 
-        "12.", Image(resource_path("images/l2_12.PNG"), width=100, height=18), Paragraph(event_date, englishnormal)],
+        ["11.", asset("l2_11"), "", 
+        "12.", asset("l2_12"), Paragraph(event_date, englishnormal)],
 
-        ["13.", Image(resource_path("images/l2_13.PNG"), width=100, height=25), Paragraph(intimation_date, englishnormal), 
-        "14.", Image(resource_path("images/l2_14.PNG"), width=100, height=22), ""],
+        ["13.", asset("l2_13"), Paragraph(intimation_date, englishnormal), 
+        "14.", asset("l2_14"), ""],
 
-        ["15.", Image(resource_path("images/l2_15.PNG"), width=100, height=14), Paragraph(Intimation_Application_id, englishnormal)]
+        ["15.", asset("l2_15"), Paragraph(Intimation_Application_id, englishnormal)]
     ]
 
     # Set outer table column widths
@@ -182,141 +336,89 @@ def generate_page1(df_transformed, block, village, fid, farmer, contact, df_fina
         1*cm, 4.2*cm, 4.74*cm, 1*cm, 4.2*cm, 4.74*cm
     ])
 
-    table.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-
-        # Merge mini-table area (columns 2-5 in row 8)
-        ("SPAN", (2, 7), (5, 7)),
-
-        # Merge notes area (columns 2–5 in row 9)
-        ("SPAN", (2, 8), (5, 8)),
-
-        # Remove padding from the mini-table container cell
-        ("LEFTPADDING", (2, 7), (5, 7), 0),
-        ("RIGHTPADDING", (2, 7), (5, 7), 0),
-        ("TOPPADDING", (2, 7), (5, 7), 0),
-        ("BOTTOMPADDING", (2, 7), (5, 7), 0),
-    ]))
+    table.setStyle(parts.page1_style)
     elements.append(table)
     elements.append(Spacer(1, 6))
-    elements.append(Image(resource_path("images/l2_middle.PNG"), width=20*cm, height=140))
+    elements.append(asset("l2_middle"))
 
-    ROWS_TARGET = 10
-    df = df_transformed.copy()
+    df = df_transformed
     
     # Compute the sum for crop area
     area_series= (
-        pd.to_numeric(df["बीमित क्षेत्र"].replace("", 0), errors="coerce")
+        pd.to_numeric(df[SPEC.area_column].replace("", 0), errors="coerce")
         .fillna(0.0)
     )
     sum_area = float(area_series.sum())
     total_area = f"{sum_area:.5f}"
-    page_df = df.drop(columns=["फसल का नाम"]).reset_index(drop=True).copy()
-    page_df = page_df.map(lambda x: "" if pd.isna(x) else str(x))
+    values = display_frame(df.drop(columns=[SPEC.crop_column])).values.tolist()
 
-    # Split into first 10 and leftover
-    page_display = page_df.iloc[:ROWS_TARGET].copy()
-    leftover_df = page_df.iloc[ROWS_TARGET:].copy()
-    
-    # Pad to exactly 10 rows
-    if len(page_display) < 10:
-        blanks_needed = 10 - len(page_display)
-        pad = pd.DataFrame([[""] * page_display.shape[1]] * blanks_needed, columns=page_display.columns)
-        page_display = pd.concat([page_display, pad], ignore_index=True)
+    # First 10 rows here (padded to exactly 10), the rest on overflow pages
+    first_page, *overflow_pages = group_pages(SPEC, len(values))
         
     # Header row
-    header_row = [
-        Image(resource_path("images/l2_table1.PNG"), width=0.6*cm, height=35),
-        Image(resource_path("images/l2_table2.PNG"), width=4.2*cm, height=42),
-        Image(resource_path("images/l2_table3.PNG"), width=2.7*cm, height=41),
-        Image(resource_path("images/l2_table4.PNG"), width=2.4*cm, height=39),
-        Image(resource_path("images/l2_table5.PNG"), width=2.2*cm, height=39),
-        Image(resource_path("images/l2_table6.PNG"), width=1.1*cm, height=35),
-        Image(resource_path("images/l2_table7.PNG"), width=1.4*cm, height=39),
-        Image(resource_path("images/l2_table8.PNG"), width=1.7*cm, height=38)
-    ]
+    header_row = list(parts.table_header)
 
-    table_rows = []
-    for i, row_vals in enumerate(page_display.values.tolist(), start=1):
-        row_vals[0] = str(i)  # force first col to 1..10 shown
-        table_rows.append(row_vals)
+    page_rows = table_rows(first_page, values, len(header_row))  # first col shown as 1..10
 
-    data = [header_row] + table_rows
-    total_label = Image(resource_path("images/l2_sum.PNG"), width=3*cm, height=15)
-    left_style = ParagraphStyle("Left", fontName="Helvetica", fontSize=9, alignment=0)
-    total_value = Paragraph(f"<b>{total_area}</b>", left_style)
+    data = [header_row] + page_rows
+    total_value = Paragraph(f"<b>{total_area}</b>", parts.left_style)
     
     total_row = [""] * 8
-    total_row[0] = total_label
+    total_row[0] = parts.total_label
     total_row[3] = total_value
     data.append(total_row)   
-    data_tbl_width = [0.9*cm, 4.72*cm, 2.92*cm, 2.42*cm, 2.02*cm, 2*cm, 2*cm, 2.9*cm]
+    data_tbl_width = DATA_TBL_WIDTH
     table = Table(data, colWidths=data_tbl_width)
     
-    tbl_style = TableStyle([
-        ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
-        ("FONTSIZE", (0, 0), (-1, -1), 8),
-        ("LEADING",  (0, 1), (-1, -1), 9),
-        ("GRID", (0, 0), (-1, -2), 0.5, colors.black),  # all grid except total row bottom
-        ("GRID", (0, -1), (-1, -1), 0.5, colors.black), # grid for total row too
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-
-        # TOTAL ROW MERGES:
-        # Merge first four cells of the total row (0..3) to make whitespace block on left
-        ("SPAN", (0, -1), (2, -1)),
-        ("SPAN", (3, -1), (7, -1)),
-        ("SPAN", (7, 1), (7, -2)),
-        # --- TOTAL ROW ALIGNMENTS ---
-        ("ALIGN", (0, -1), (0, -1), "RIGHT"),  # label right
-        ("ALIGN", (3, -1), (3, -1), "LEFT"),   # value left
-
-        # --- TOTAL ROW HEIGHT (smaller) ---
-        ("TOPPADDING", (0, -1), (-1, -1), 0),
-        ("BOTTOMPADDING", (0, -1), (-1, -1), 0),
-    ])
-    
+    tbl_style = parts.table_style
     table.setStyle(tbl_style)
     elements.append(table)
     elements.append(Spacer(1, 2))   
     
-    blow_tbl_img = Image(resource_path("images/l2_p1_below_table.PNG"), width=6*cm, height=0.8*cm)
-    blow_tbl_img_tbl = Table([[blow_tbl_img]], colWidths=[19.88*cm])  # colWidths same as the image width
-    blow_tbl_img_tbl.setStyle(TableStyle([
-        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 0),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-        ("TOPPADDING", (0, 0), (-1, -1), 0),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
-    ]))
+    blow_tbl_img_tbl = parts.new_below_table()
     elements.append(blow_tbl_img_tbl)
     
     elements.append(Spacer(1, 50))    
-    sign1_img = save_image_with_texts(resource_path("images/l2_sign1.PNG"), farmer, contact, font_path=resource_path("fonts/Helvetica.ttf"), out_w=4.9*cm, out_h=40)
+    sign1_path, sign1_w, sign1_h = SPEC.asset("l2_sign1")
+    sign1_img = save_image_with_texts(resource_path(sign1_path), farmer, contact, font_path=resource_path("fonts/Helvetica.ttf"), out_w=sign1_w, out_h=sign1_h,
+                                      vector_text=vector_sign_text)
     
     # Example data (replace with your content)
-    data_sign = [[
-        sign1_img,
-        Image(resource_path("images/l2_sign2.PNG"), width=4.9*cm, height=40),
-        Image(resource_path("images/l2_sign3.PNG"), width=4.9*cm, height=40),
-        Image(resource_path("images/l2_sign4.PNG"), width=4.9*cm, height=40)  
-    ]]
+    data_sign = [[sign1_img, *parts.sign_images]]
 
     # Create table
     table_sign = Table(data_sign, colWidths=[4.97*cm, 4.97*cm, 4.97*cm, 4.97*cm], rowHeights=40)
     elements.append(table_sign)
-    elements.append(Image(resource_path("images/l2_bottom.PNG"), width=20*cm, height=40))
+    elements.append(asset("l2_bottom"))
 
-    if len(leftover_df) > 0:
+    if overflow_pages:
         elements.append(PageBreak())
-        elements += generate_page2(leftover_df, header_row, data_tbl_width, tbl_style, table_sign, total_value, fid, englishnormal)
+        elements += generate_page2(overflow_pages, values, header_row, data_tbl_width, tbl_style, table_sign, total_value,
+                                   fid, englishnormal, fast_grid)
     return elements
                              
             
-def generate_pdf(df_transformed, save_path, block, village, fid, farmer, contact, df_final_filtered):
+def generate_pdf(df_transformed, save_path, block, village, fid, farmer, contact, df_final_filtered,
+                 crop_groups=None, vector_sign_text=False, fast_grid=False):
     return generate_pdf2(
         df_transformed, save_path, block, village, fid, farmer, contact,
-        df_final_filtered, generate_page1
-    )
\ No newline at end of file
+        df_final_filtered, partial(generate_page1, vector_sign_text=vector_sign_text, fast_grid=fast_grid),
+        DOC_MARGINS, crop_groups
+    )
+
+def render_pdf(df_transformed, block, village, fid, farmer, contact, df_final_filtered,
+               crop_groups=None, vector_sign_text=False, fast_grid=False, stream=None):
+    # PDF bytes, or written to stream when one is given
+    return render_pdf2(
+        df_transformed, block, village, fid, farmer, contact,
+        df_final_filtered, partial(generate_page1, vector_sign_text=vector_sign_text, fast_grid=fast_grid),
+        DOC_MARGINS, crop_groups, stream
+    )
+
+def build_elements(df_transformed, block, village, fid, farmer, contact, df_final_filtered,
+                   crop_groups=None, vector_sign_text=False, fast_grid=False):
+    return build_elements2(
+        df_transformed, block, village, fid, farmer, contact,
+        df_final_filtered, partial(generate_page1, vector_sign_text=vector_sign_text, fast_grid=fast_grid),
+        crop_groups
+    )
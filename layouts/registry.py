@@ -0,0 +1,182 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from importlib import import_module
+
+# Every layout the app can render, described as data: where its page code
+# lives, which sheet columns end up in which table column, how many rows
+# fit on each page, page margins and table column widths, and the artwork
+# it draws at which size. The UI menu, the batch engine, the command line,
+# incremental manifests and the benchmarks all read from here, so a new
+# insurer form is a new module with build_elements / render_pdf /
+# generate_pdf / static_parts plus one register() call below.
+#
+# Kept free of pandas / ReportLab imports so the UI can list layouts at
+# startup; modules and transforms are imported on first use.
+
+CM = 72 / 2.54  # points, same value as reportlab.lib.units.cm
+
+# Column map entries: (table column, sheet column, kind) where kind is
+#   "serial"  running number 1..n
+#   "text"    the sheet value as display text
+#   "cls"     Saksham ID cut to the part after the last dash
+#   "blank"   left empty for handwriting (sheet column is None)
+#
+# Asset entries: (name, file under images/, width, height), sizes in points.
+# The layout draws every image by name, so one file drawn at two sizes is
+# two entries.
+
+
+@dataclass(frozen=True)
+class LayoutSpec:
+    name: str                # as shown in the UI and accepted by --layout
+    module: str              # module with the layout's page code
+    version: int             # bump when rendered pages change (incremental runs rebuild)
+    columns: tuple           # column map, see above
+    crop_column: str         # table column holding the crop name
+    area_column: str         # table column summed into the "total area" cell
+    rows_per_page: int       # data rows on a full table page
+    first_page_rows: int     # data rows on a crop's first page (0: no table there, see common/pagination.py)
+    serials_per_page: bool   # table rows numbered from 1 on every page, rather than across a crop's pages
+    margins_cm: tuple        # left, right, top, bottom
+    col_widths_cm: tuple     # data table column widths
+    assets: tuple            # artwork, see above
+
+    def load(self):
+        return import_module(self.module)
+
+    def transform(self, df_final_filtered):
+        from common.data_transform import transform_columns
+        return transform_columns(df_final_filtered, self.columns)
+
+    def doc_margins(self):
+        return _geometry(self)["margins"]
+
+    def col_widths(self):
+        return _geometry(self)["col_widths"]
+
+    def asset(self, name):
+        # (path relative to the app folder, width, height) of a declared image
+        try:
+            return _geometry(self)["assets"][name]
+        except KeyError:
+            raise ValueError(f"{self.name} declares no asset '{name}'") from None
+
+    def asset_files(self):
+        return sorted({file for _, file, _, _ in self.assets})
+
+
+@lru_cache(maxsize=None)
+def _geometry(spec):
+    # Point values worked out once per layout rather than per document
+    left, right, top, bottom = (value * CM for value in spec.margins_cm)
+    return {
+        "margins": dict(leftMargin=left, rightMargin=right, topMargin=top, bottomMargin=bottom),
+        "col_widths": [width * CM for width in spec.col_widths_cm],
+        "assets": {name: (f"images/{file}", width, height) for name, file, width, height in spec.assets},
+    }
+
+
+_REGISTRY = {}
+DEFAULT_LAYOUT = "Layout2"
+
+
+def register(spec):
+    _REGISTRY[spec.name] = spec
+    return spec
+
+
+def get(name):
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown layout '{name}'. Choose one of: {', '.join(_REGISTRY)}") from None
+
+
+def names():
+    # Default layout first (the UI menu order), the rest in registration order
+    return sorted(_REGISTRY, key=lambda name: name != DEFAULT_LAYOUT)
+
+
+def specs():
+    return [_REGISTRY[name] for name in names()]
+
+
+register(LayoutSpec(
+    name="Layout1",
+    module="layouts.layout1",
+    version=1,
+    columns=(
+        ("क्र.सं.", None, "serial"),
+        ("सीएलएस नंबर", "Saksham ID", "cls"),
+        ("आवेदन संख्या", "Intimation_Application id", "text"),
+        ("फसल का नाम", "Crop", "text"),
+        ("सर्वे/उप सर्वे नंबर", "Survey Number", "text"),
+        ("प्रभावित क्षेत्र (हेक्टेयर में)", "Crop Area", "text"),
+        ("हानि प्रतिशत", None, "blank"),
+        ("रिमार्क", None, "blank"),
+    ),
+    crop_column="फसल का नाम",
+    area_column="प्रभावित क्षेत्र (हेक्टेयर में)",
+    rows_per_page=22,
+    first_page_rows=0,
+    serials_per_page=True,
+    margins_cm=(1.5, 1.5, 2, 2),
+    col_widths_cm=(1.5, 2.0, 4.3, 2.9, 2.4, 2.6, 2.1, 2.1),
+    assets=(
+        ("title", "title.PNG", 20 * CM, 30),
+        ("rest_page1", "rest_page1.PNG", 20 * CM, 410),
+        ("title_page2", "title_page2.PNG", 20 * CM, 50),
+        # Cover page labels 1-16; label 8 reuses 2.PNG
+        *((f"label{n}", f"{n}.PNG", 100, 15) for n in (1, 2, 3, 4, 5, 6)),
+        *((f"label{n}", f"{n}.PNG", 100, 20) for n in (7, 9, 10, 11, 12)),
+        ("label8", "2.PNG", 100, 20),
+        ("label13", "13.PNG", 100, 30),
+        ("label14", "14.PNG", 100, 30),
+        ("label15", "15.PNG", 100, 40),
+        ("label16", "16.PNG", 100, 15),
+        # Data table header
+        *((f"col{n}", f"col{n}.PNG", width * CM, 20)
+          for n, width in enumerate((1.4, 1.8, 4.3, 3, 2.6, 2.8, 2.4, 2.4), 1)),
+        *((f"sign_{n}", f"sign_{n}.PNG", 7 * CM, 30) for n in (1, 2, 3)),
+    ),
+))
+
+register(LayoutSpec(
+    name="Layout2",
+    module="layouts.layout2",
+    version=1,
+    columns=(
+        ("क्र.सं.", None, "serial"),
+        ("आवेदन संख्या", "Intimation_Application id", "text"),
+        ("सीएलएस नंबर / टिकट संख्या (वैकल्पिक)", "Saksham ID", "cls"),
+        ("भूमि सर्वेक्षण . किला नं.", "Survey Number", "text"),
+        ("बीमित क्षेत्र", "Crop Area", "text"),
+        ("प्रभावित क्षेत्र (% में)", None, "blank"),
+        ("प्रभावित क्षेत्र में नुकसान (% में)", None, "blank"),
+        ("टिप्पणी (यदि कोई है)", None, "blank"),
+        ("फसल का नाम", "Crop", "text"),
+    ),
+    crop_column="फसल का नाम",
+    area_column="बीमित क्षेत्र",
+    rows_per_page=40,
+    first_page_rows=10,
+    serials_per_page=False,
+    margins_cm=(1.5, 1.5, 1, 1),
+    col_widths_cm=(0.9, 4.72, 2.92, 2.42, 2.02, 2, 2, 2.9),
+    assets=(
+        ("l2_title", "l2_title.PNG", 20 * CM, 45),
+        ("l2_middle", "l2_middle.PNG", 20 * CM, 140),
+        ("l2_bottom", "l2_bottom.PNG", 20 * CM, 40),
+        ("l2_sum", "l2_sum.PNG", 3 * CM, 15),
+        ("l2_p1_below_table", "l2_p1_below_table.PNG", 6 * CM, 0.8 * CM),
+        # First page labels 1-15
+        *((f"l2_{n}", f"l2_{n}.PNG", 100, height)
+          for n, height in enumerate((13, 13, 17, 17, 15, 15, 22, 23, 18, 15, 18, 18, 25, 22, 14), 1)),
+        # Data table header
+        *((f"l2_table{n}", f"l2_table{n}.PNG", width * CM, height)
+          for n, (width, height) in enumerate(((0.6, 35), (4.2, 42), (2.7, 41), (2.4, 39),
+                                               (2.2, 39), (1.1, 35), (1.4, 39), (1.7, 38)), 1)),
+        # Signature boxes; box 1 gets the farmer's name and contact drawn on it
+        *((f"l2_sign{n}", f"l2_sign{n}.PNG", 4.9 * CM, 40) for n in (1, 2, 3, 4)),
+    ),
+))
@@ -1,19 +1,25 @@
 import sys
 from ui_widgets import HoverComboBox
-from layouts import layout1, layout2
 from pathlib import Path
 import tempfile
-import time
-import platform
-import os
-import pandas as pd
-from common.data_transform import transform_filtered_data, transform_filtered_data2
+from functools import partial
+from ui_worker import BatchWorker
+from layouts import registry
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog,
-    QComboBox, QMessageBox, QListView, QLabel, QSizePolicy
+    QComboBox, QMessageBox, QListView, QLabel, QSizePolicy, QProgressDialog, QCheckBox
 )
 from PyQt5.QtCore import Qt
 
+# pandas, ReportLab, PIL and the layouts are imported inside the handlers that
+# need them, so the window can show before they load (main.py warms them up
+# on a background thread meanwhile).
+
+# Endings that make an archive name clearly the wrong kind of file. Any other
+# dot in a name ("Vill.A") is part of the name and the archive suffix is added.
+OTHER_FILE_SUFFIXES = (".pdf", ".rar", ".7z", ".gz", ".bz2", ".xz", ".zst", ".cab", ".iso",
+                       ".xlsx", ".xlsm", ".xls", ".csv", ".txt", ".doc", ".docx", ".png", ".jpg")
+
 class ExcelFilterApp(QWidget):
     def __init__(self):
         super().__init__()
@@ -21,9 +27,9 @@ class ExcelFilterApp(QWidget):
         self.setGeometry(400, 300, 320, 240)
 
         self.df_full = None
-        self.df_block_filtered = None
+        self.sheet_index = None
         self.df_final_filtered = None
-        self.df_village_filtered = None
+        self.worker = None
 
         self.init_ui()
 
@@ -68,15 +74,9 @@ class ExcelFilterApp(QWidget):
 
         # inside init_ui()
         self.layout_dropdown = HoverComboBox()
-        self.layout_dropdown.addItems(["Layout2","Layout1"])   # names shown to user
+        self.layout_dropdown.addItems(registry.names())   # names shown to user, default first
         add_centered_dropdown("Select Layout:", self.layout_dropdown)
 
-        # keep a map from dropdown text -> module
-        self.layouts = {
-            "Layout1": layout1,
-            "Layout2": layout2,
-        }
-
         # Block dropdown
         self.block_dropdown = HoverComboBox()
         self.block_dropdown.currentIndexChanged.connect(self.populate_villages)
@@ -112,6 +112,16 @@ class ExcelFilterApp(QWidget):
 
         main_layout.addLayout(button_row)
 
+        # Batch mode: write the whole village into one PDF instead of one per farmer
+        self.merge_checkbox = QCheckBox("One PDF per village")
+        self.merge_checkbox.setStyleSheet("font-size: 10pt;")
+        main_layout.addWidget(self.merge_checkbox, alignment=Qt.AlignCenter)
+
+        # Batch mode: stream the farmer PDFs into one archive at a chosen location
+        self.archive_checkbox = QCheckBox("Save village as ZIP")
+        self.archive_checkbox.setStyleSheet("font-size: 10pt;")
+        main_layout.addWidget(self.archive_checkbox, alignment=Qt.AlignCenter)
+
     def load_excel(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self, "Open Excel File", "", "Excel Files (*.xlsx *.xls)"
@@ -120,18 +130,23 @@ class ExcelFilterApp(QWidget):
         if not file_path:
             return
 
-        try:
-            df = pd.read_excel(file_path, sheet_name=0).fillna("")
+        from common.excel_loader import MissingColumnsError
+        from common.sheet_cache import load_sheet_cached
+        from common.sheet_index import SheetIndex
 
-            if not {"Block", "Village"}.issubset(df.columns):
-                QMessageBox.critical(self, "Missing Columns", "Excel file must contain 'Block' and 'Village' columns.")
+        try:
+            try:
+                df, _ = load_sheet_cached(file_path)
+            except MissingColumnsError as e:
+                QMessageBox.critical(self, "Missing Columns", str(e))
                 return
 
+            # Built once here; every dropdown and batch slice reads from it
+            self.sheet_index = SheetIndex(df)
             self.df_full = df
-            self.df_block_filtered = None
             self.df_final_filtered = None
 
-            blocks = sorted(df["Block"].unique().astype(str))
+            blocks = self.sheet_index.blocks()
             self.block_dropdown.clear()
             self.block_dropdown.addItem("Select Block")
             self.village_dropdown.clear()
@@ -143,17 +158,10 @@ class ExcelFilterApp(QWidget):
 
     def populate_villages(self):
         block = self.block_dropdown.currentText()
-        if block == "Select Block" or self.df_full is None:
+        if block == "Select Block" or self.sheet_index is None:
             return
 
-        self.df_block_filtered = self.df_full[self.df_full["Block"].astype(str) == block].copy()
-        self.df_block_filtered["FID"] = self.df_block_filtered["FID"].apply(
-            lambda x: "" if pd.isna(x)
-            else str(int(x)) if isinstance(x, (int, float)) and float(x).is_integer()
-            else str(x)
-        )
-
-        villages = sorted(self.df_block_filtered["Village"].unique().astype(str))
+        villages = self.sheet_index.villages(block)
         self.village_dropdown.clear()
         self.village_dropdown.addItem("Select Village")
         self.village_dropdown.addItems(villages)
@@ -165,15 +173,13 @@ class ExcelFilterApp(QWidget):
         self.farmer_dropdown.addItem("Select Farmer Name")
         
     def populate_fids(self):
+        block = self.block_dropdown.currentText()
         village = self.village_dropdown.currentText()
-        if village == "Select Village" or self.df_block_filtered is None:
+        if village == "Select Village" or self.sheet_index is None:
             return
 
-        df_village_filtered = self.df_block_filtered[self.df_block_filtered["Village"].astype(str) == village]
-        self.df_village_filtered = df_village_filtered
-        fids = sorted(df_village_filtered["FID"].unique())
+        fids = self.sheet_index.fids(block, village)
 
-        
         self.fid_dropdown.clear()
         self.fid_dropdown.addItem("Select Farmer ID")
         self.fid_dropdown.addItems(fids)
@@ -182,29 +188,100 @@ class ExcelFilterApp(QWidget):
         self.farmer_dropdown.addItem("Select Farmer Name")
         
     def populate_farmers(self):
+        block = self.block_dropdown.currentText()
+        village = self.village_dropdown.currentText()
         fid = self.fid_dropdown.currentText()
-        if fid == "Select Farmer ID" or self.df_village_filtered is None:
+        if fid == "Select Farmer ID" or self.sheet_index is None:
             return
 
-        self.df_fid_filtered = self.df_village_filtered[self.df_village_filtered["FID"] == fid]
-        farmers = sorted(self.df_fid_filtered["Farmer Name"].unique().astype(str))
+        farmers = self.sheet_index.farmers(block, village, fid)
         
         self.farmer_dropdown.clear()
         self.farmer_dropdown.addItem("Select Farmer Name")
         self.farmer_dropdown.addItems(farmers)
         
+    def start_batch(self, plan, farmers, progress_title, done_title, done_message, workers=None, runner=None):
+        # plan: returns the jobs, run on the worker thread (see BatchWorker);
+        # farmers: their names in job order
+        self.pdf_button.setEnabled(False)
+        self.print_button.setEnabled(False)
+
+        self.progress_dialog = QProgressDialog(f"Preparing {len(farmers)} farmers...", "Cancel", 0, len(farmers), self)
+        self.progress_dialog.setWindowTitle(progress_title)
+        self.progress_dialog.setWindowModality(Qt.WindowModal)
+        self.progress_dialog.setMinimumDuration(0)
+        self.progress_dialog.setAutoClose(False)
+        self.progress_dialog.setAutoReset(False)
+        self.progress_dialog.setValue(0)
+
+        self.worker = BatchWorker(plan, farmers, workers=workers, runner=runner, parent=self)
+        self.worker.progress.connect(self.update_batch_progress)
+        self.worker.finished_batch.connect(
+            lambda results, error: self.finish_batch(results, error, len(farmers), done_title, done_message)
+        )
+        self.progress_dialog.canceled.connect(self.cancel_batch)
+        self.worker.start()
+
+    def cancel_batch(self):
+        if getattr(self, "worker", None) is not None:
+            self.worker.cancel()
+            self.progress_dialog.setLabelText("Cancelling after the current farmer...")
+
+    def update_batch_progress(self, done, total, current, eta, throughput):
+        if self.worker.is_cancelled():
+            return
+        self.progress_dialog.setValue(done)
+        self.progress_dialog.setLabelText(
+            f"{done} / {total} farmers done\n"
+            f"Current: {current}\n"
+            f"{throughput:.2f} farmers/s, about {int(eta // 60)}m {int(eta % 60)}s left"
+        )
+
+    def finish_batch(self, results, error, total, done_title, done_message):
+        cancelled = self.worker.is_cancelled()
+        self.worker.wait()
+        self.worker = None
+        self.progress_dialog.close()
+        self.pdf_button.setEnabled(True)
+        self.print_button.setEnabled(True)
+
+        if error:
+            QMessageBox.critical(
+                self, "Error",
+                f"The batch stopped after {len(results)} of {total} farmers:\n{error}"
+            )
+            return
+
+        errors = [f"{r.farmer} ({r.fid}): {r.error}" for r in results if r.error]
+        message = done_message.format(ok=len(results) - len(errors), total=total)
+        if cancelled:
+            message += f"\nCancelled after {len(results)} farmers."
+        if errors:
+            shown = errors[:20]
+            message += f"\n\n{len(errors)} failed:\n" + "\n".join(shown)
+            if len(errors) > len(shown):
+                message += f"\n... and {len(errors) - len(shown)} more"
+            QMessageBox.warning(self, done_title, message)
+        else:
+            QMessageBox.information(self, done_title, message)
+
     def save_pdf(self):
         block = self.block_dropdown.currentText()
         village = self.village_dropdown.currentText()
         fid = self.fid_dropdown.currentText()
         farmer = self.farmer_dropdown.currentText()
         selected_layout_name = self.layout_dropdown.currentText()
-        layout = self.layouts.get(selected_layout_name, layout2)
-        
+
         if block == "Select Block" or village == "Select Village":
             QMessageBox.warning(self, "Missing Selection", "Please select at least Block and Village.")
             return
 
+        from common.archive import ARCHIVE_SUFFIXES, run_archive
+        from common.batch import file_fid, iter_jobs, load_layout, run_merged
+        from common.data_transform import cell_text
+        layout_name = selected_layout_name if selected_layout_name in registry.names() else registry.DEFAULT_LAYOUT
+        layout, transform = load_layout(layout_name)
+
         if getattr(sys, 'frozen', False):
             # App is running from a PyInstaller .exe
             app_dir = Path(sys.executable).parent
@@ -214,20 +291,15 @@ class ExcelFilterApp(QWidget):
 
         # Option 1: All four selected — Single farmer mode
         if fid != "Select Farmer ID" and farmer != "Select Farmer Name":
-            self.df_final_filtered = self.df_fid_filtered[
-                (self.df_fid_filtered["Farmer Name"].astype(str) == farmer)
-            ]
-            contact = self.df_final_filtered["Contact Number"].astype(str).iloc[0]  # safe
+            self.df_final_filtered = self.df_full.iloc[self.sheet_index.rows(block, village, fid, farmer)]
             if self.df_final_filtered.empty:
                 QMessageBox.warning(self, "No Data", "No data found for selected farmer.")
                 return
+            contact = cell_text(self.df_final_filtered["Contact Number"].iloc[0])
 
-            if layout ==layout1:
-                df_transformed = transform_filtered_data(self.df_final_filtered)
-            else:
-                df_transformed = transform_filtered_data2(self.df_final_filtered)
+            df_transformed = transform(self.df_final_filtered)
                 
-            save_path = app_dir / f"{block} {village} {fid}.pdf"
+            save_path = app_dir / f"{block} {village} {file_fid(self.sheet_index, block, village, fid, farmer)}.pdf"
 
             try:
                 layout.generate_pdf(
@@ -240,44 +312,38 @@ class ExcelFilterApp(QWidget):
 
         # Option 2: Only Block + Village — Batch mode
         elif fid == "Select Farmer ID" and farmer == "Select Farmer Name":
-            df_village = self.df_block_filtered[
-                (self.df_block_filtered["Village"].astype(str) == village)
-            ]
-            farmers = df_village[["FID", "Farmer Name"]].drop_duplicates()
-
-            if farmers.empty:
+            farmers = [name for _, name, _ in self.sheet_index.farmer_groups(block, village)]
+            if not farmers:
                 QMessageBox.warning(self, "No Data", "No farmer records found in this village.")
                 return
-
-            errors = []
-
-            for _, row in farmers.iterrows():
-                current_fid = str(row["FID"])
-                current_name = str(row["Farmer Name"])
-                self.df_final_filtered = df_village[
-                    (df_village["FID"].astype(str) == current_fid) &
-                    (df_village["Farmer Name"].astype(str) == current_name)
-                ]
-                if self.df_final_filtered.empty:
-                    continue
-                contact = self.df_final_filtered["Contact Number"].astype(str).iloc[0]
-                
-                if layout ==layout1:            
-                    df_transformed = transform_filtered_data(self.df_final_filtered)
-                else:
-                    df_transformed = transform_filtered_data2(self.df_final_filtered)
-                    
-                save_path = app_dir / f"{block} {village} {current_fid}.pdf"
-
-                try:
-                    layout.generate_pdf(
-                        df_transformed, save_path, block, village, current_fid, current_name, contact, self.df_final_filtered
-                    )
-                except Exception as e:
-                    errors.append(f"{current_name}: {e}")
-
-            QMessageBox.information(self, "Done", f"Saved {len(farmers)} PDFs.\n" +
-                                    ("Some errors occurred." if errors else ""))
+            # Planned on the worker thread, a village at a time as rendering goes
+            plan = partial(iter_jobs, self.df_full, layout_name, app_dir, block=block, village=village,
+                           index=self.sheet_index)
+
+            # Render on a background thread so the window stays responsive
+            if self.archive_checkbox.isChecked():
+                # File type filter -> suffix added when the typed name has none
+                archive_filters = {"ZIP archive (*.zip)": ".zip", "Tar archive (*.tar *.tar.gz *.tgz)": ".tar"}
+                archive_path, chosen_filter = QFileDialog.getSaveFileName(
+                    self, "Save Archive", str(app_dir / f"{block} {village}.zip"), ";;".join(archive_filters)
+                )
+                if not archive_path:
+                    return
+                if not archive_path.lower().endswith(ARCHIVE_SUFFIXES):
+                    suffix = Path(archive_path).suffix
+                    if suffix.lower() in OTHER_FILE_SUFFIXES:
+                        QMessageBox.warning(self, "Unsupported Archive",
+                                            f"Can't save as '{suffix}'. Use one of: {', '.join(ARCHIVE_SUFFIXES)}")
+                        return
+                    archive_path += archive_filters.get(chosen_filter, ".zip")
+                self.start_batch(plan, farmers, "Saving archive", "Done", f"Saved {{ok}} of {{total}} PDFs to:\n{archive_path}",
+                                 runner=partial(run_archive, archive_path=archive_path))
+            elif self.merge_checkbox.isChecked():
+                save_path = app_dir / f"{block} {village}.pdf"
+                self.start_batch(plan, farmers, "Saving PDF", "Done", f"Saved {{ok}} of {{total}} farmers to:\n{save_path}",
+                                 runner=partial(run_merged, save_path=save_path))
+            else:
+                self.start_batch(plan, farmers, "Saving PDFs", "Done", "Saved {ok} of {total} PDFs.")
             return
 
         # Invalid combination
@@ -290,99 +356,57 @@ class ExcelFilterApp(QWidget):
         fid = self.fid_dropdown.currentText()
         farmer = self.farmer_dropdown.currentText()
         selected_layout_name = self.layout_dropdown.currentText()
-        layout = self.layouts.get(selected_layout_name, layout2)
-        
+
         if block == "Select Block" or village == "Select Village":
             QMessageBox.warning(self, "Missing Selection", "Please select at least Block and Village.")
             return
 
-        system = platform.system()
-        if system != "Windows":
-            QMessageBox.warning(self, "Unsupported", "Printing is only supported on Windows.")
+        from common.batch import iter_jobs
+        from common.print_queue import default_backend, page_log_path, print_jobs, print_merged
+        backend = default_backend()
+        if backend is None:
+            QMessageBox.warning(self, "Unsupported", "No printing system was found on this computer.")
             return
 
         temp_dir = tempfile.gettempdir()
-        
+        layout_name = selected_layout_name if selected_layout_name in registry.names() else registry.DEFAULT_LAYOUT
+        file_name = "{block}_{village}_{fid}_print.pdf"
+        # Rendering and printing both run off the UI thread: each PDF is queued for
+        # the printer as soon as it is written, while later farmers keep rendering.
+        runner = partial(print_jobs, backend=backend)
+
         # Option 1: Single farmer
         if fid != "Select Farmer ID" and farmer != "Select Farmer Name":
-            self.df_final_filtered = self.df_fid_filtered[
-                (self.df_fid_filtered["Farmer Name"].astype(str) == farmer)
-            ]
-            contact = self.df_final_filtered["Contact Number"].astype(str).iloc[0]
-            if self.df_final_filtered.empty:
+            if not any(name == farmer for _, name, _ in self.sheet_index.farmer_groups(block, village, fid)):
                 QMessageBox.warning(self, "No Data", "No data found for selected farmer.")
                 return
+            df_full, index = self.df_full, self.sheet_index
 
-            if layout ==layout1:  
-                df_transformed = transform_filtered_data(self.df_final_filtered)
-            else:
-                df_transformed = transform_filtered_data2(self.df_final_filtered)
-                
-            temp_path = os.path.join(temp_dir, f"{block}_{village}_{fid}_print.pdf")
-
-            try:
-                layout.generate_pdf(
-                    df_transformed, temp_path, block, village, fid, farmer, contact, self.df_final_filtered
-                )
-                try:
-                    import win32api
-                    win32api.ShellExecute(0, "print", temp_path, None, ".", 0)
-                    time.sleep(5)
-                    os.remove(temp_path)
-                except:
-                    pass
-                QMessageBox.information(self, "Printed", "PDF sent to printer.")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to print PDF:\n{e}")
+            def plan():
+                return (job for job in iter_jobs(df_full, layout_name, temp_dir, block=block, village=village,
+                                                 fid=fid, file_name=file_name, index=index)
+                        if job.farmer == farmer)
+            self.start_batch(plan, [farmer], "Printing", "Printed", "PDF sent to printer.", runner=runner)
 
         # Option 2: All farmers in village
         elif fid == "Select Farmer ID" and farmer == "Select Farmer Name":
-            df_village = self.df_block_filtered[
-                (self.df_block_filtered["Village"].astype(str) == village)
-            ]
-
-            farmers = df_village[["FID", "Farmer Name"]].drop_duplicates()
-
-            if farmers.empty:
+            farmers = [name for _, name, _ in self.sheet_index.farmer_groups(block, village)]
+            if not farmers:
                 QMessageBox.warning(self, "No Data", "No farmer records found in this village.")
                 return
-
-            errors = []
-
-            for _, row in farmers.iterrows():
-                current_fid = str(row["FID"])
-                current_name = str(row["Farmer Name"])
-                self.df_final_filtered = df_village[
-                    (df_village["FID"].astype(str) == current_fid) &
-                    (df_village["Farmer Name"].astype(str) == current_name)
-                ]
-                contact = self.df_final_filtered["Contact Number"].astype(str).iloc[0]  # safe
-                if self.df_final_filtered.empty:
-                    continue
-
-                if layout ==layout1:
-                    df_transformed = transform_filtered_data(self.df_final_filtered)
-                else:
-                    df_transformed = transform_filtered_data2(self.df_final_filtered)
-                    
-                temp_path = os.path.join(temp_dir, f"{block}_{village}_{current_fid}_print.pdf")
-
-                try:
-                    layout.generate_pdf(
-                    df_transformed, temp_path, block, village, current_fid, current_name, contact, self.df_final_filtered
-                )
-                    try:
-                        import win32api
-                        win32api.ShellExecute(0, "print", temp_path, None, ".", 0)
-                        time.sleep(5)
-                        os.remove(temp_path)
-                    except:
-                        pass
-                except Exception as e:
-                    errors.append(f"{current_name}: {e}")
-
-            QMessageBox.information(self, "Printed", f"Sent {len(farmers)} files to printer.\n" +
-                                    ("Some errors occurred." if errors else ""))
+            plan = partial(iter_jobs, self.df_full, layout_name, temp_dir, block=block, village=village,
+                           file_name=file_name, index=self.sheet_index)
+
+            if self.merge_checkbox.isChecked():
+                # One print job for the whole village
+                save_path = Path(temp_dir) / f"{block} {village}_print.pdf"
+                self.start_batch(plan, farmers, "Printing", "Printed",
+                                 f"Sent {{ok}} of {{total}} farmers to printer as one job.\n"
+                                 f"Page ranges: {page_log_path(save_path)}",
+                                 runner=partial(print_merged, backend=backend, save_path=save_path))
+            else:
+                self.start_batch(plan, farmers, "Printing", "Printed", "Sent {ok} of {total} files to printer.",
+                                 runner=runner)
 
         # Invalid selection
         else:
@@ -0,0 +1,60 @@
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class BatchWorker(QThread):
+    # done, total, current farmer, eta seconds, farmers per second
+    progress = pyqtSignal(int, int, str, float, float)
+    # list of FarmerResult in job order, and the error that stopped the batch
+    # early ("" when it ran to the end; the results are then the farmers done so far)
+    finished_batch = pyqtSignal(list, str)
+
+    def __init__(self, plan, farmers, workers=None, runner=None, parent=None):
+        super().__init__(parent)
+        # Imported here rather than at the top so the window can start without pandas/ReportLab
+        from common.batch import default_workers, run_jobs
+        # plan() returns the jobs (e.g. partial(iter_jobs, ...)) and is called on
+        # this thread, so planning a big village never holds up the window;
+        # farmers are their names in job order, for the progress label
+        self.plan = plan
+        self.farmers = farmers
+        # run_jobs for one file per farmer, or e.g. partial(run_merged, save_path=...)
+        self.runner = runner or run_jobs
+        self.workers = workers or default_workers()
+        self._cancelled = False
+        self._start = 0.0
+        self._done = 0
+        self._results = []
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def _on_result(self, result):
+        self._results.append(result)
+        self._done += 1
+        total = len(self.farmers)
+        elapsed = time.perf_counter() - self._start
+        throughput = self._done / elapsed if elapsed > 0 else 0.0
+        eta = (total - self._done) / throughput if throughput > 0 else 0.0
+        current = self.farmers[self._done] if self._done < total else result.farmer
+        self.progress.emit(self._done, total, current, eta, throughput)
+
+    def run(self):
+        self._start = time.perf_counter()
+        self._done = 0
+        self._results = []
+        # An exception escaping run() would abort the whole application, so
+        # anything planning or the runner raises (a crashed worker process, an
+        # unwritable output, ...) is handed to the window instead
+        try:
+            results = self.runner(
+                self.plan(), workers=self.workers,
+                on_result=self._on_result, should_stop=self.is_cancelled,
+            )
+        except Exception as e:
+            self.finished_batch.emit(self._results, str(e) or type(e).__name__)
+            return
+        self.finished_batch.emit(results, "")